@@ -0,0 +1,41 @@
+# api/charts.py
+import base64
+import io
+from typing import Dict, List
+
+
+def metrics_series(metrics: List[Dict]) -> Dict[str, list]:
+    """Chart data in plotting order, oldest training run first"""
+    ordered = sorted(metrics, key=lambda m: m['created_at'])
+    return {
+        "dates": [m['created_at'] for m in ordered],
+        "rmse": [m['rmse'] for m in ordered],
+        "mae": [m['mae'] for m in ordered],
+    }
+
+
+def render_metrics_chart(symbol: str, metrics: List[Dict]) -> str:
+    """RMSE/MAE over training runs as a base64 encoded PNG
+
+    Draws on its own Figure with the Agg canvas instead of the global pyplot
+    state, so concurrent renders cannot draw into each other's figures.
+    Runs in the API's worker process pool, so it only takes plain data.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    series = metrics_series(metrics)
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(series["dates"], series["rmse"], label='RMSE')
+    ax.plot(series["dates"], series["mae"], label='MAE')
+    ax.set_xlabel('Training Date')
+    ax.set_ylabel('Error Value')
+    ax.set_title(f'Model Performance Over Time - {symbol}')
+    ax.legend()
+    ax.tick_params(axis='x', labelrotation=45)
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', bbox_inches='tight')
+    return base64.b64encode(buf.getvalue()).decode('utf-8')
@@ -0,0 +1,114 @@
+# api/data_sources.py
+from abc import ABC, abstractmethod
+import asyncio
+from pathlib import Path
+import random
+from typing import Iterable, List, Optional, Tuple
+import pandas as pd
+from config import config
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# (symbol, start, end) with dates as "YYYY-MM-DD", end exclusive
+FetchRequest = Tuple[str, str, str]
+
+
+class DataSource(ABC):
+    """Source of daily OHLCV bars"""
+
+    @abstractmethod
+    def fetch_history(self, symbol: str, start: str, end: str) -> pd.DataFrame:
+        """Bars from start (inclusive) to end (exclusive), indexed by date"""
+
+    async def afetch_history(self, symbol: str, start: str, end: str) -> pd.DataFrame:
+        # Blocking sources run in a thread so many requests can be in flight
+        return await asyncio.to_thread(self.fetch_history, symbol, start, end)
+
+
+class YahooFinanceSource(DataSource):
+    def fetch_history(self, symbol: str, start: str, end: str) -> pd.DataFrame:
+        import yfinance as yf
+        data = yf.Ticker(symbol).history(start=start, end=end, interval="1d")
+        return data[OHLCV].dropna() if not data.empty else pd.DataFrame(columns=OHLCV)
+
+
+class FileSource(DataSource):
+    """Reads bars from <directory>/<SYMBOL>.parquet or <SYMBOL>.csv
+
+    CSV files need a Date column plus the OHLCV columns. Useful for running
+    and benchmarking the refresh offline.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+
+    def fetch_history(self, symbol: str, start: str, end: str) -> pd.DataFrame:
+        parquet_path = self.directory / f"{symbol}.parquet"
+        csv_path = self.directory / f"{symbol}.csv"
+        if parquet_path.exists():
+            data = pd.read_parquet(parquet_path)
+        elif csv_path.exists():
+            data = pd.read_csv(csv_path, index_col="Date")
+        else:
+            return pd.DataFrame(columns=OHLCV)
+
+        data.index = pd.to_datetime(data.index)
+        data = data.sort_index()
+        data = data[(data.index >= pd.Timestamp(start)) & (data.index < pd.Timestamp(end))]
+        return data[OHLCV].dropna()
+
+
+def get_data_source(source_dir: Optional[str] = None) -> DataSource:
+    """File source when a directory is given or configured, else Yahoo Finance"""
+    directory = source_dir or config.data_source_dir
+    return FileSource(directory) if directory else YahooFinanceSource()
+
+
+class AsyncFetcher:
+    """Fetches many symbols concurrently with rate limiting and retries
+
+    At most ``max_concurrency`` requests run at once and new requests start
+    no faster than ``requests_per_second``. Failed requests are retried with
+    exponential backoff and jitter.
+    """
+
+    def __init__(self, source: DataSource, max_concurrency: int = config.fetch_concurrency,
+                 requests_per_second: float = config.fetch_requests_per_second,
+                 retries: int = config.fetch_retries, backoff: float = 1.0):
+        self.source = source
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.retries = retries
+        self.backoff = backoff
+
+    async def fetch_many(self, requests: Iterable[FetchRequest]) -> List[Tuple[FetchRequest, Optional[pd.DataFrame], Optional[Exception]]]:
+        """Return (request, data, error) for every request, in request order"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        rate_lock = asyncio.Lock()
+        next_slot = 0.0
+
+        async def throttle():
+            nonlocal next_slot
+            async with rate_lock:
+                loop = asyncio.get_running_loop()
+                delay = next_slot - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_slot = max(next_slot, loop.time()) + 1 / self.requests_per_second
+
+        async def fetch(request: FetchRequest):
+            async with semaphore:
+                for attempt in range(self.retries + 1):
+                    await throttle()
+                    try:
+                        return request, await self.source.afetch_history(*request), None
+                    except Exception as e:
+                        if attempt == self.retries:
+                            return request, None, e
+                        await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random() / 2))
+
+        return list(await asyncio.gather(*(fetch(request) for request in requests)))
+
+    def fetch_all(self, requests: Iterable[FetchRequest]):
+        """Blocking wrapper around fetch_many for synchronous callers"""
+        return asyncio.run(self.fetch_many(list(requests)))
@@ -1,24 +1,159 @@
+from collections import OrderedDict
+import itertools
 import json
+import os
 from contextlib import contextmanager
 from datetime import datetime
 import sqlite3
-from typing import Dict, List, Optional
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Union
+from api.telemetry import timed
 from config import config
-import joblib
 
-@contextmanager
-def get_connection():
-    conn = sqlite3.connect(config.db_path)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-    finally:
-        conn.close()
+# joblib, NumPy and pandas are imported where they are used, so the CLI and
+# API endpoints that only touch SQLite start without them
+if TYPE_CHECKING:
+    import pandas as pd
+
+# DataFrame column name -> historical_data column and NumPy dtype
+OHLCV_COLUMNS = {
+    "Open": ("open", "f8"),
+    "High": ("high", "f8"),
+    "Low": ("low", "f8"),
+    "Close": ("close", "f8"),
+    "Volume": ("volume", "i8"),
+}
+
+DateLike = Union[str, datetime, None]
+
+def _format_date(value: DateLike) -> Optional[str]:
+    if value is None or isinstance(value, str):
+        return value
+    return value.strftime("%Y-%m-%d")
+
+class ConnectionPool:
+    """Bounded pool of SQLite connections, reused instead of reconnecting.
+
+    At most ``size`` read-only and ``size`` read-write connections are open
+    at once; callers beyond that wait up to ``timeout`` seconds for one to be
+    released. Idle connections are reused most-recently-released first, so
+    the busy ones keep a warm page cache. A pool used after a fork drops the
+    connections it inherited, since SQLite connections must not cross a fork.
+    """
+
+    def __init__(self, db_path, size: int = config.db_pool_size, timeout: float = 30.0):
+        self.db_path = Path(db_path)
+        self.size = size
+        self.timeout = timeout
+        self._reset()
+
+    def _reset(self):
+        # Inherited connections are abandoned, not closed: closing them could
+        # release locks the parent still relies on
+        self._pid = os.getpid()
+        self.hits = 0
+        self.misses = 0
+        self._idle = {False: [], True: []}
+        self._open = {False: 0, True: 0}
+        self._slots = {False: threading.BoundedSemaphore(self.size),
+                       True: threading.BoundedSemaphore(self.size)}
+        self._lock = threading.Lock()
+
+    def _connect(self, readonly: bool) -> sqlite3.Connection:
+        if readonly:
+            uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        else:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA cache_size=-{int(config.sqlite_cache_size_kb)}")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _acquire(self, readonly: bool) -> sqlite3.Connection:
+        if self._pid != os.getpid():
+            self._reset()
+        if not self._slots[readonly].acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError(f"No database connection free after {self.timeout}s")
+        with self._lock:
+            if self._idle[readonly]:
+                self.hits += 1
+                return self._idle[readonly].pop()
+            self.misses += 1
+            self._open[readonly] += 1
+        try:
+            return self._connect(readonly)
+        except BaseException:
+            with self._lock:
+                self._open[readonly] -= 1
+            self._slots[readonly].release()
+            raise
+
+    def _release(self, conn: sqlite3.Connection, readonly: bool):
+        if self._pid != os.getpid():
+            return  # Acquired before a fork; the reset pool does not own it
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            with self._lock:
+                self._idle[readonly].append(conn)
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._open[readonly] -= 1
+        finally:
+            self._slots[readonly].release()
+
+    @contextmanager
+    def connection(self, readonly: bool = False):
+        conn = self._acquire(readonly)
+        try:
+            yield conn
+        finally:
+            self._release(conn, readonly)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            idle = len(self._idle[False]) + len(self._idle[True])
+            open_ = self._open[False] + self._open[True]
+            return {
+                "size": self.size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "open": open_,
+                "idle": idle,
+                "in_use": open_ - idle,
+            }
+
+
+_pools: Dict[Path, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def _reset_pools_lock():
+    # The lock may have been held by another thread at the moment of the fork
+    global _pools_lock
+    _pools_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_pools_lock)
+
+def get_pool() -> ConnectionPool:
+    """Return the pool for the currently configured database."""
+    db_path = Path(config.db_path)
+    with _pools_lock:
+        if db_path not in _pools:
+            _pools[db_path] = ConnectionPool(db_path, config.db_pool_size)
+        return _pools[db_path]
+
+def get_connection(readonly: bool = False):
+    return get_pool().connection(readonly)
 
 class DatabaseManager:
     @staticmethod
+    @timed("db.get_latest_date")
     def get_latest_date(symbol: str) -> Optional[datetime]:
-        with get_connection() as conn:
+        with get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT MAX(date) 
@@ -29,22 +164,105 @@ class DatabaseManager:
             return datetime.strptime(result, "%Y-%m-%d") if result else None
 
     @staticmethod
-    def save_historical_data(symbol: str, data: Dict[str, Dict[str, float]]):
-        with get_connection() as conn:
+    @timed("db.bar_stats")
+    def bar_stats(symbol: str) -> tuple:
+        """(last bar date, bar count) of a symbol; changes whenever bars are added"""
+        with get_connection(readonly=True) as conn:
             cursor = conn.cursor()
-            for date, values in data.items():
-                cursor.execute("""
-                    INSERT OR IGNORE INTO historical_data 
+            cursor.execute("""
+                SELECT MAX(date), COUNT(*)
+                FROM historical_data
+                WHERE symbol = ?
+            """, (symbol,))
+            return tuple(cursor.fetchone())
+
+    @staticmethod
+    @timed("db.metrics_stats")
+    def metrics_stats(symbol: str) -> tuple:
+        """(latest created_at, row count) of a symbol's model metrics"""
+        with get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT MAX(created_at), COUNT(*)
+                FROM metrics
+                WHERE symbol = ?
+            """, (symbol,))
+            return tuple(cursor.fetchone())
+
+    @staticmethod
+    @timed("db.fetch_model_metrics")
+    def fetch_model_metrics(symbol: str) -> List[Dict]:
+        """Metrics of every trained model for a symbol, newest first"""
+        with get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT symbol, model_type, mse, rmse, mae, created_at
+                FROM metrics
+                WHERE symbol = ?
+                ORDER BY created_at DESC
+            """, (symbol,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    @staticmethod
+    def list_symbols() -> List[str]:
+        with get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT DISTINCT symbol FROM historical_data ORDER BY symbol")
+            return [row[0] for row in cursor.fetchall()]
+
+    @staticmethod
+    def save_historical_data(symbol: str, data: Dict[str, Dict[str, float]]) -> Dict[str, int]:
+        if not data:
+            return {"inserted": 0, "skipped": 0}
+        import pandas as pd
+        frame = pd.DataFrame.from_dict(data, orient="index")
+        return DatabaseManager.save_historical_frame(symbol, frame)
+
+    @staticmethod
+    @timed("db.save_historical_frame")
+    def save_historical_frame(symbol: str, data: "pd.DataFrame") -> Dict[str, int]:
+        """Bulk insert OHLCV bars from a DataFrame in a single transaction.
+
+        The index holds the bar dates (DatetimeIndex or "YYYY-MM-DD" strings).
+        Bars that already exist are left untouched and counted as skipped.
+        """
+        import pandas as pd
+        missing = OHLCV_COLUMNS.keys() - set(data.columns)
+        if missing:
+            raise ValueError(f"Missing required columns: {sorted(missing)}")
+
+        if isinstance(data.index, pd.DatetimeIndex):
+            dates = data.index.strftime("%Y-%m-%d").tolist()
+        else:
+            dates = [str(d) for d in data.index]
+
+        columns = [
+            data[c].to_numpy(dtype=OHLCV_COLUMNS[c][1]).tolist()
+            for c in OHLCV_COLUMNS
+        ]
+        rows = zip(itertools.repeat(symbol), dates, *columns)
+
+        with get_connection() as conn:
+            before = conn.total_changes
+            with conn:
+                conn.executemany("""
+                    INSERT OR IGNORE INTO historical_data
                     (symbol, date, open, high, low, close, volume)
                     VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (symbol, date, 
-                      values["Open"], values["High"], 
-                      values["Low"], values["Close"], values["Volume"]))
-            conn.commit()
+                """, rows)
+                inserted = conn.total_changes - before
+                if dates:
+                    conn.execute("""
+                        INSERT INTO symbol_watermarks (symbol, last_date) VALUES (?, ?)
+                        ON CONFLICT(symbol) DO UPDATE
+                        SET last_date = MAX(COALESCE(last_date, ''), excluded.last_date)
+                    """, (symbol, max(dates)))
+
+        return {"inserted": inserted, "skipped": len(dates) - inserted}
 
     @staticmethod
     def fetch_historical_data(symbol: str) -> Dict[str, Dict[str, float]]:
-        with get_connection() as conn:
+        with get_connection(readonly=True) as conn:
             cursor = conn.cursor()
             cursor.execute("""
                 SELECT date, open, high, low, close, volume
@@ -64,6 +282,123 @@ class DatabaseManager:
             }
 
     @staticmethod
+    def historical_query(symbol: str, start: DateLike = None, end: DateLike = None,
+                         columns: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> tuple:
+        """SQL, parameters and column list for a filtered bar query
+
+        Rows come back as (date, *columns) in ascending date order. ``start``
+        and ``end`` are inclusive; ``limit`` keeps only the most recent bars.
+        """
+        columns = list(columns) if columns is not None else list(OHLCV_COLUMNS)
+        unknown = set(columns) - OHLCV_COLUMNS.keys()
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+
+        query = f"""
+            SELECT date, {", ".join(OHLCV_COLUMNS[c][0] for c in columns)}
+            FROM historical_data
+            WHERE symbol = ?"""
+        params = [symbol]
+        if start is not None:
+            query += " AND date >= ?"
+            params.append(_format_date(start))
+        if end is not None:
+            query += " AND date <= ?"
+            params.append(_format_date(end))
+        if limit is not None:
+            query = f"SELECT * FROM ({query} ORDER BY date DESC LIMIT ?) ORDER BY date ASC"
+            params.append(int(limit))
+        else:
+            query += " ORDER BY date ASC"
+        return query, params, columns
+
+    @staticmethod
+    @timed("db.fetch_historical_rows")
+    def fetch_historical_rows(symbol: str, start: DateLike = None, end: DateLike = None,
+                              columns: Optional[Sequence[str]] = None, limit: Optional[int] = None) -> tuple:
+        """Filtered bars as plain (date, *columns) tuples, plus the column list"""
+        query, params, columns = DatabaseManager.historical_query(symbol, start, end, columns, limit)
+        with get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(query, params)
+            return cursor.fetchall(), columns
+
+    @staticmethod
+    @timed("db.fetch_historical_frame")
+    def fetch_historical_frame(symbol: str, start: DateLike = None, end: DateLike = None,
+                               columns: Optional[Sequence[str]] = None,
+                               limit: Optional[int] = None) -> "pd.DataFrame":
+        """Load OHLCV bars as a typed, date-indexed DataFrame.
+
+        Rows are read straight into NumPy column arrays, so no per-row dicts
+        are built. ``start`` and ``end`` are inclusive; ``limit`` keeps only
+        the most recent bars.
+        """
+        import numpy as np
+        import pandas as pd
+        rows, columns = DatabaseManager.fetch_historical_rows(symbol, start, end, columns, limit)
+        dtype = [("date", "U10")] + [(c, OHLCV_COLUMNS[c][1]) for c in columns]
+        table = np.array(rows, dtype=dtype)
+        index = pd.to_datetime(table["date"], format="%Y-%m-%d")
+        return pd.DataFrame({c: table[c] for c in columns}, index=index, columns=columns)
+
+    @staticmethod
+    def fetch_watermarks() -> Dict[str, Dict]:
+        """Refresh state of every symbol, read in a single query"""
+        with get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT symbol, last_date, last_fetch_at, gaps FROM symbol_watermarks")
+            return {
+                row["symbol"]: {
+                    "last_date": datetime.strptime(row["last_date"], "%Y-%m-%d").date() if row["last_date"] else None,
+                    "last_fetch_at": datetime.fromisoformat(row["last_fetch_at"]) if row["last_fetch_at"] else None,
+                    "gaps": [tuple(datetime.strptime(d, "%Y-%m-%d").date() for d in gap)
+                             for gap in json.loads(row["gaps"])],
+                }
+                for row in cursor.fetchall()
+            }
+
+    @staticmethod
+    def update_watermark(symbol: str, last_fetch_at: datetime, gaps: List):
+        """Record a refresh of ``symbol`` and the date ranges known to be empty"""
+        gaps_json = json.dumps([[start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")] for start, end in gaps])
+        with get_connection() as conn:
+            with conn:
+                conn.execute("""
+                    INSERT INTO symbol_watermarks (symbol, last_fetch_at, gaps) VALUES (?, ?, ?)
+                    ON CONFLICT(symbol) DO UPDATE
+                    SET last_fetch_at = excluded.last_fetch_at, gaps = excluded.gaps
+                """, (symbol, last_fetch_at.isoformat(), gaps_json))
+
+    @staticmethod
+    @timed("db.fetch_predictions")
+    def fetch_predictions(symbol: str, model_version: str, last_data_date: str) -> Dict[int, Dict[str, float]]:
+        """Stored forecasts for a model and data snapshot, keyed by horizon"""
+        with get_connection(readonly=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT horizon, predictions
+                FROM predictions
+                WHERE symbol = ? AND model_version = ? AND last_data_date = ?
+            """, (symbol, model_version, last_data_date))
+            return {row["horizon"]: json.loads(row["predictions"]) for row in cursor.fetchall()}
+
+    @staticmethod
+    @timed("db.save_predictions")
+    def save_predictions(symbol: str, model_version: str, last_data_date: str,
+                         forecasts: Dict[int, Dict[str, float]]):
+        with get_connection() as conn:
+            with conn:
+                conn.executemany("""
+                    INSERT OR REPLACE INTO predictions
+                    (symbol, model_version, last_data_date, horizon, predictions, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [(symbol, model_version, last_data_date, horizon, json.dumps(predictions), datetime.now())
+                      for horizon, predictions in forecasts.items()])
+
+    @staticmethod
+    @timed("db.save_model_metrics")
     def save_model_metrics(symbol: str, metrics: Dict):
         required_keys = {"model_type", "mse", "rmse", "mae"}
         missing_keys = required_keys - metrics.keys()
@@ -74,22 +409,177 @@ class DatabaseManager:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT OR REPLACE INTO metrics 
-                (symbol, model_type, mse, rmse, mae, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
+                (symbol, model_type, mse, rmse, mae, fingerprint, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             """, (symbol, metrics.get("model_type"), 
                 metrics["mse"], metrics["rmse"], 
-                metrics["mae"], datetime.now()))
+                metrics["mae"], metrics.get("fingerprint"), datetime.now()))
             conn.commit()
             print(f"Metrics for {symbol} saved: {metrics}")
 
 
 class ModelStore:
+    # Bump when the bundle layout changes so stale files are rejected on load
+    BUNDLE_VERSION = 3
+
+    @staticmethod
+    def model_path(symbol: str) -> Path:
+        return config.model_store_path / f"{symbol}.joblib"
+
     @staticmethod
-    def save_model(symbol: str, model):
-        config.model_store_path.mkdir(exist_ok=True)
-        joblib.dump(model, config.model_store_path / f"{symbol}.joblib")
+    def estimator_path(symbol: str) -> Path:
+        return config.model_store_path / f"{symbol}.estimator.joblib"
+
+    @staticmethod
+    def _dump_atomic(value, path: Path):
+        # Written next to the old file and swapped in with a rename, so
+        # processes that still map the old file keep valid pages
+        import joblib
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            joblib.dump(value, tmp_path, compress=0)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    @staticmethod
+    @timed("model.save_bundle")
+    def save_bundle(symbol: str, bundle: Dict):
+        """Save a model bundle (estimator, fitted scaler, features, metadata)
+
+        The fitted sklearn estimator goes to its own file, used only for
+        incremental updates and inspection. The bundle file holds the
+        metadata and the forest flattened into plain node arrays; it is
+        written last, so its mtime marks a complete save.
+        """
+        from api.ml.forest import flatten_forest
+        config.model_store_path.mkdir(parents=True, exist_ok=True)
+        estimator = bundle["estimator"]
+        ModelStore._dump_atomic(estimator, ModelStore.estimator_path(symbol))
+        serving = {key: value for key, value in bundle.items() if key != "estimator"}
+        ModelStore._dump_atomic({**serving, "forest": flatten_forest(estimator),
+                                 "format_version": ModelStore.BUNDLE_VERSION},
+                                ModelStore.model_path(symbol))
+        model_cache.discard(symbol)
+
+    @staticmethod
+    @timed("model.load_bundle")
+    def load_bundle(symbol: str, with_estimator: bool = False) -> Optional[Dict]:
+        """Load a model bundle; bundle["predictor"] predicts with the forest
+
+        With config.model_mmap_mode the node arrays are memory-mapped and
+        the predictor reads them in place, so processes serving the same
+        model share its pages in the page cache. ``with_estimator`` also
+        loads the sklearn estimator, a private in-memory copy.
+        """
+        model_path = ModelStore.model_path(symbol)
+        if not model_path.exists():
+            return None
+        import joblib
+        from api.ml.forest import ForestPredictor
+        bundle = joblib.load(model_path, mmap_mode=config.model_mmap_mode)
+        if not isinstance(bundle, dict) or bundle.get("format_version") != ModelStore.BUNDLE_VERSION:
+            raise ValueError(f"Model for {symbol} was saved in an outdated format, "
+                             f"retrain it with: python cli.py train-model {symbol}")
+        bundle["predictor"] = ForestPredictor(bundle["forest"])
+        if with_estimator:
+            bundle["estimator"] = joblib.load(ModelStore.estimator_path(symbol))
+        return bundle
+
+    @staticmethod
+    def model_mtime(symbol: str) -> Optional[int]:
+        """Modification time of the stored model, a cheap stand-in for its version"""
+        try:
+            return ModelStore.model_path(symbol).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    @timed("model.get_cached_bundle")
+    def get_cached_bundle(symbol: str) -> Optional[Dict]:
+        """Like load_bundle, but served from the in-process model cache"""
+        return model_cache.get(symbol, ModelStore.load_bundle)
 
     @staticmethod
     def load_model(symbol: str):
-        model_path = config.model_store_path / f"{symbol}.joblib"
-        return joblib.load(model_path) if model_path.exists() else None
+        bundle = ModelStore.load_bundle(symbol, with_estimator=True)
+        return bundle["estimator"] if bundle else None
+
+
+class ModelCache:
+    """In-memory LRU cache of model bundles, bounded by model file size.
+
+    Each entry remembers the mtime and size of the file it was loaded from.
+    A model rewritten on disk, e.g. by ``cli.py train-model`` in another
+    process, is reloaded on its next lookup.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()  # symbol -> (file version, size, bundle)
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, loader):
+        try:
+            stat = ModelStore.model_path(symbol).stat()
+        except FileNotFoundError:
+            self.discard(symbol)
+            return None
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry and entry[0] == version:
+                self._entries.move_to_end(symbol)
+                self.hits += 1
+                return entry[2]
+            self.misses += 1
+            if entry:
+                self.invalidations += 1
+                self._remove(symbol)
+
+        bundle = loader(symbol)
+        if bundle is not None:
+            self._put(symbol, version, stat.st_size, bundle)
+        return bundle
+
+    def _put(self, symbol: str, version, size: int, bundle):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(symbol)
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            self._entries[symbol] = (version, size, bundle)
+            self.current_bytes += size
+
+    def _remove(self, symbol: str):
+        entry = self._entries.pop(symbol, None)
+        if entry:
+            self.current_bytes -= entry[1]
+
+    def discard(self, symbol: str):
+        with self._lock:
+            self._remove(symbol)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+model_cache = ModelCache(config.model_cache_max_bytes)
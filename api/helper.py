@@ -1,7 +1,9 @@
 
-from datetime import datetime, timedelta
-import yfinance as yf
-from Stock_Analysis_ML.api.database import get_connection, get_latest_date, save_historical_data
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+from config import config
+from api.database import DatabaseManager
+from api.data_sources import AsyncFetcher, get_data_source
 
 
 def get_date_range(period: str):
@@ -20,35 +22,80 @@ def get_date_range(period: str):
     return start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
 
 
-def update_existing_data():
-    conn = get_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT symbol FROM historical_data")
-    symbols = [row[0] for row in cursor.fetchall()]
-    
-    for symbol in symbols:
-        latest_date = get_latest_date(symbol)
-        if not latest_date:
+# Empty ranges younger than this may still get late bars, so are not gaps yet
+GAP_SETTLE_DAYS = 3
+
+
+def missing_ranges(last_date: date, today: date, gaps) -> List[Tuple[date, date]]:
+    """Date ranges after last_date that still need fetching, end exclusive
+
+    Ranges are only split around recorded gaps (dates known to have no
+    bars). Weekends stay inside ranges since sources simply return no bars
+    for them, so a refresh is one request per symbol in the common case.
+    Today is left out because its bar is not final yet.
+    """
+    ranges = []
+    start = None
+    day = last_date + timedelta(days=1)
+    while day < today:
+        wanted = not any(gap_start <= day <= gap_end for gap_start, gap_end in gaps)
+        if wanted and start is None:
+            start = day
+        elif not wanted and start is not None:
+            ranges.append((start, day))
+            start = None
+        day += timedelta(days=1)
+    if start is not None:
+        ranges.append((start, today))
+    return ranges
+
+
+def update_existing_data(source=None):
+    """Fetch only the missing bars of every stored symbol
+
+    Reads all watermarks in one query, skips symbols refreshed within
+    config.data_cache_days, and requests just the missing date ranges.
+    Saving a range moves the symbol's watermark past it, so ranges are
+    saved oldest first and a failed range stops the symbol: nothing after
+    it is stored and the next run fetches from the failure onwards.
+    """
+    now = datetime.now()
+    today = now.date()
+    watermarks = DatabaseManager.fetch_watermarks()
+
+    requests = []
+    for symbol, watermark in watermarks.items():
+        if not watermark["last_date"]:
+            continue
+        if watermark["last_fetch_at"] and now - watermark["last_fetch_at"] < timedelta(days=config.data_cache_days):
             continue
-            
-        # Only fetch new data if last stored date is older than today
-        if datetime.strptime(latest_date, "%Y-%m-%d").date() < datetime.today().date():
-            stock = yf.Ticker(symbol)
-            new_data = stock.history(
-                start=latest_date,
-                end=datetime.today().strftime("%Y-%m-%d"),
-                interval="1d"
-            ).dropna()
-            
+        for start, end in missing_ranges(watermark["last_date"], today, watermark["gaps"]):
+            requests.append((symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")))
+
+    fetcher = AsyncFetcher(source or get_data_source())
+    results = {}
+    for (symbol, start, end), new_data, error in fetcher.fetch_all(requests):
+        results.setdefault(symbol, []).append((start, end, new_data, error))
+
+    for symbol, fetched in results.items():
+        gaps = list(watermarks[symbol]["gaps"])
+        failed = False
+        for start, end, new_data, error in sorted(fetched, key=lambda item: item[0]):
+            if error is not None:
+                failed = True
+                break
             if not new_data.empty:
-                formatted_data = {
-                    row.name.strftime("%Y-%m-%d"): {
-                        "Open": row["Open"],
-                        "High": row["High"],
-                        "Low": row["Low"],
-                        "Close": row["Close"],
-                        "Volume": row["Volume"],
-                    }
-                    for _, row in new_data.iterrows()
-                }
-                save_historical_data(symbol, formatted_data)
\ No newline at end of file
+                DatabaseManager.save_historical_frame(symbol, new_data)
+
+            # Days after the last returned bar that are old enough to be final
+            empty_from = (new_data.index.max().date() + timedelta(days=1) if not new_data.empty
+                          else datetime.strptime(start, "%Y-%m-%d").date())
+            empty_to = min(datetime.strptime(end, "%Y-%m-%d").date(),
+                           today - timedelta(days=GAP_SETTLE_DAYS)) - timedelta(days=1)
+            if empty_from <= empty_to:
+                gaps.append((empty_from, empty_to))
+
+        last_date = DatabaseManager.get_latest_date(symbol).date()
+        gaps = [(gap_start, gap_end) for gap_start, gap_end in gaps if gap_end > last_date]
+        if not failed:
+            DatabaseManager.update_watermark(symbol, now, gaps)
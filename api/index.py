@@ -1,6 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-import yfinance as yf
+from api.data_sources import get_data_source
 import pandas as pd
 import numpy as np
 from sklearn.linear_model import LinearRegression
@@ -47,11 +47,11 @@ def get_stock_data(symbol: str):
         end_date = datetime.today()
         start_date = end_date - timedelta(days=TRAINING_PERIOD_DAYS)
         
-        stock = yf.Ticker(symbol)
-        data = stock.history(
-            start=start_date.strftime("%Y-%m-%d"),
-            end=end_date.strftime("%Y-%m-%d")
-        ).dropna()
+        data = get_data_source().fetch_history(
+            symbol,
+            start_date.strftime("%Y-%m-%d"),
+            end_date.strftime("%Y-%m-%d")
+        )
         
         if data.empty:
             raise HTTPException(status_code=404, detail="Stock data not found")
@@ -1,14 +1,32 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from api.routes import stocks, metrics
+from api.routes import stocks, metrics, system
+from api.telemetry import configure_logging, log_request, registry, request_scope
+from api.workers import shutdown_process_pool
+from initialize_db import initialize_db
+import time
+import uuid
 from config import config
 
 # uvicorn api.main:app --reload
 
+configure_logging(config.request_log_level)
+
+# The API is often the first thing run against a database, so bring its
+# schema up to date before serving; migrate() is a no-op when it is current
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config.model_store_path.mkdir(exist_ok=True, parents=True)
+    initialize_db()
+    yield
+    shutdown_process_pool()
+
 app = FastAPI(
     title="Stock Analysis API",
     docs_url="/api/py/docs",
-    openapi_url="/api/py/openapi.json"
+    openapi_url="/api/py/openapi.json",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -19,8 +37,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Tags every response with an X-Request-ID (the caller's, if it sent one) and
+# logs the request's stage breakdown under that id
+@app.middleware("http")
+async def request_telemetry(request: Request, call_next):
+    rid = request.headers.get("x-request-id") or uuid.uuid4().hex
+    started = time.perf_counter()
+    with request_scope(rid) as spans:
+        response = await call_next(request)
+    seconds = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    path = route.path if route else "unmatched"
+    registry.observe("stock_api_request_seconds", seconds, method=request.method,
+                     route=path, status=response.status_code)
+    log_request(rid, request.method, request.url.path, response.status_code, seconds, spans)
+    response.headers["X-Request-ID"] = rid
+    return response
+
 app.include_router(stocks.router)
 app.include_router(metrics.router)
+app.include_router(system.router)
 
 @app.get("/startup")
 async def startup_event():
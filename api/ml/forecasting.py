@@ -0,0 +1,68 @@
+# api/ml/forecasting.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+from api.database import DatabaseManager, ModelStore
+from config import config
+
+
+def forecast_symbol(symbol: str, horizons: List[int]) -> Dict:
+    """Forecast one symbol for several horizons
+
+    Forecasts are stored per (model version, last bar date, horizon) and
+    served from the predictions table until a new bar arrives or the model
+    is retrained. A stored longer horizon also answers shorter ones, since
+    the recursive forecast of the first days does not depend on the horizon.
+    Anything missing is computed with a single run of the longest horizon.
+    """
+    bundle = ModelStore.get_cached_bundle(symbol)
+    if not bundle:
+        return {"symbol": symbol, "error": "Model not found"}
+    latest_date = DatabaseManager.get_latest_date(symbol)
+    if not latest_date:
+        return {"symbol": symbol, "error": "Data not found"}
+
+    model_version = bundle["model_version"]
+    last_data_date = latest_date.strftime("%Y-%m-%d")
+    stored = DatabaseManager.fetch_predictions(symbol, model_version, last_data_date)
+
+    forecasts, missing = {}, []
+    for horizon in horizons:
+        covering = [h for h in stored if h >= horizon]
+        if covering:
+            forecasts[horizon] = dict(islice(stored[min(covering)].items(), horizon))
+        else:
+            missing.append(horizon)
+
+    if missing:
+        # The bundle anchors the date features, so only the recent bars the
+        # forecast starts from are needed
+        from api.ml.training import StockModelTrainer  # keeps sklearn out of API startup
+        trainer = StockModelTrainer.from_bundle(bundle)
+        df = DatabaseManager.fetch_historical_frame(symbol, limit=trainer.volume_window + 1)
+        path = trainer.predict_future(bundle["predictor"], df, max(missing))
+        computed = {horizon: dict(islice(path.items(), horizon)) for horizon in missing}
+        DatabaseManager.save_predictions(symbol, model_version, last_data_date,
+                                         {max(missing): computed[max(missing)]})
+        forecasts.update(computed)
+
+    return {
+        "symbol": symbol,
+        "model_version": model_version,
+        "last_data_date": last_data_date,
+        "forecasts": {str(horizon): forecasts[horizon] for horizon in horizons},
+    }
+
+
+def forecast_symbols(symbols: Iterable[str], horizons: List[int],
+                     max_workers: Optional[int] = None) -> Iterator[Dict]:
+    """Yield forecasts for many symbols as each one completes"""
+    symbols = list(dict.fromkeys(symbols))
+    horizons = sorted(set(horizons))
+    with ThreadPoolExecutor(max_workers=max_workers or config.forecast_workers) as pool:
+        futures = {pool.submit(forecast_symbol, symbol, horizons): symbol for symbol in symbols}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"symbol": futures[future], "error": str(e)}
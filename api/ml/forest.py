@@ -0,0 +1,66 @@
+# api/ml/forest.py
+import numpy as np
+
+# Flat forest layout, one row per node across all trees. Leaves point to
+# themselves, so walking a fixed number of levels lands every row on its leaf.
+
+
+def flatten_forest(model) -> dict:
+    """Node arrays of a fitted single-output RandomForestRegressor
+
+    sklearn copies tree nodes into its own buffers when a pickled forest is
+    loaded, so a memory-mapped pickle does not stay shared. Plain arrays in
+    this layout can be memory-mapped and read in place by ForestPredictor.
+    """
+    trees = [estimator.tree_ for estimator in model.estimators_]
+    if any(tree.n_outputs != 1 for tree in trees):
+        raise ValueError("Only single-output forests can be flattened")
+
+    sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+    roots = np.concatenate(([0], np.cumsum(sizes)[:-1])).astype(np.int64)
+    feature, threshold, left, right, value = [], [], [], [], []
+    for tree, root in zip(trees, roots):
+        nodes = np.arange(tree.node_count, dtype=np.int64) + root
+        leaf = tree.children_left < 0
+        feature.append(np.where(leaf, 0, tree.feature).astype(np.int64))
+        threshold.append(np.where(leaf, 0.0, tree.threshold))
+        left.append(np.where(leaf, nodes, tree.children_left + root))
+        right.append(np.where(leaf, nodes, tree.children_right + root))
+        value.append(tree.value[:, 0, 0].astype(np.float64))
+
+    return {
+        "feature": np.concatenate(feature),
+        "threshold": np.concatenate(threshold),
+        "left": np.concatenate(left),
+        "right": np.concatenate(right),
+        "value": np.concatenate(value),
+        "roots": roots,
+        "max_depth": max(tree.max_depth for tree in trees),
+        "n_features": model.n_features_in_,
+    }
+
+
+class ForestPredictor:
+    """Predicts like the flattened RandomForestRegressor, reading arrays in place
+
+    All trees are walked at once, one vectorized step per tree level. Inputs
+    are compared as float32, as sklearn does, so splits match exactly.
+    """
+
+    def __init__(self, forest: dict):
+        self.forest = forest
+        self.n_features_in_ = forest["n_features"]
+        self.n_estimators = len(forest["roots"])
+
+    def predict(self, X) -> np.ndarray:
+        forest = self.forest
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has shape {X.shape}, expected (n, {self.n_features_in_})")
+
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(forest["roots"], (len(X), self.n_estimators))
+        for _ in range(forest["max_depth"]):
+            go_left = X[rows, forest["feature"][nodes]] <= forest["threshold"][nodes]
+            nodes = np.where(go_left, forest["left"][nodes], forest["right"][nodes])
+        return forest["value"][nodes].mean(axis=1)
@@ -0,0 +1,129 @@
+# api/ml/scheduler.py
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import json
+from pathlib import Path
+import time
+from typing import Callable, Dict, Iterable, Optional
+from api.database import DatabaseManager, ModelStore
+from api.ml.training import StockModelTrainer
+
+MIN_TRAINING_ROWS = 100
+
+
+def train_symbol(symbol: str, n_jobs: int = -1, force: bool = False,
+                 incremental: bool = False) -> Dict:
+    """Train, evaluate and save the model for one symbol
+
+    Unless ``force`` is set, training is skipped when the saved model was
+    built from an input with the same fingerprint. With ``incremental`` the
+    saved forest gets extra trees for the new bars instead of a full refit,
+    unless StockModelTrainer.full_retrain_reason says otherwise.
+    """
+    started = time.perf_counter()
+    df = DatabaseManager.fetch_historical_frame(symbol)
+    result = {"symbol": symbol, "rows": len(df)}
+
+    if len(df) < MIN_TRAINING_ROWS:
+        return {**result, "status": "insufficient_data", "seconds": time.perf_counter() - started}
+
+    trainer = StockModelTrainer(symbol, n_jobs=n_jobs)
+    fingerprint = trainer.fingerprint(df)
+    result["fingerprint"] = fingerprint
+
+    bundle = None
+    if not force:
+        try:
+            bundle = ModelStore.load_bundle(symbol, with_estimator=incremental)
+        except ValueError:
+            bundle = None
+        if bundle and bundle.get("fingerprint") == fingerprint:
+            return {**result, "status": "unchanged", "seconds": time.perf_counter() - started}
+
+    status = "trained"
+    if incremental and bundle:
+        updater = StockModelTrainer.from_bundle(bundle, n_jobs=n_jobs)
+        reason = updater.full_retrain_reason(bundle, df)
+        if reason is None:
+            trainer = updater
+            model, metrics = trainer.update_model(bundle["estimator"], df)
+            status = "updated"
+        else:
+            result["full_retrain_reason"] = reason
+    if status == "trained":
+        model, metrics = trainer.train_model(df)
+
+    test_metrics = {**metrics["test"], "model_type": metrics["model_type"], "fingerprint": fingerprint}
+    DatabaseManager.save_model_metrics(symbol, test_metrics)
+    ModelStore.save_bundle(symbol, trainer.to_bundle(model, metrics, fingerprint))
+
+    return {**result, "status": status, "metrics": test_metrics,
+            "seconds": time.perf_counter() - started}
+
+
+class TrainingScheduler:
+    """Trains models for many symbols within a fixed core budget
+
+    ``concurrency`` symbols train at once, each in its own process, and each
+    forest fits with ``model_jobs`` cores. Keep concurrency * model_jobs at
+    or below the number of cores to avoid oversubscription.
+    """
+
+    def __init__(self, symbols: Iterable[str], concurrency: int = 1, model_jobs: int = -1,
+                 force: bool = False, incremental: bool = False):
+        self.symbols = list(dict.fromkeys(symbols))
+        self.concurrency = concurrency
+        self.model_jobs = model_jobs
+        self.force = force
+        self.incremental = incremental
+
+    def run(self, on_result: Optional[Callable[[Dict], None]] = None) -> Dict:
+        started_at = datetime.now()
+        started = time.perf_counter()
+        results = []
+
+        def record(result):
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        if self.concurrency <= 1:
+            for symbol in self.symbols:
+                record(self._train_one(symbol))
+        else:
+            with ProcessPoolExecutor(max_workers=self.concurrency) as pool:
+                futures = {
+                    pool.submit(train_symbol, symbol, self.model_jobs, self.force, self.incremental): symbol
+                    for symbol in self.symbols
+                }
+                for future in as_completed(futures):
+                    try:
+                        record(future.result())
+                    except Exception as e:
+                        record({"symbol": futures[future], "status": "failed", "error": str(e)})
+
+        return {
+            "started_at": started_at.isoformat(),
+            "seconds": time.perf_counter() - started,
+            "concurrency": self.concurrency,
+            "model_jobs": self.model_jobs,
+            "incremental": self.incremental,
+            "counts": dict(Counter(result["status"] for result in results)),
+            "results": sorted(results, key=lambda result: result["symbol"]),
+        }
+
+    def _train_one(self, symbol: str) -> Dict:
+        try:
+            return train_symbol(symbol, self.model_jobs, self.force, self.incremental)
+        except Exception as e:
+            return {"symbol": symbol, "status": "failed", "error": str(e)}
+
+    @staticmethod
+    def write_report(report: Dict, path: Optional[Path] = None) -> Path:
+        if path is None:
+            path = Path("reports") / f"train_all_{datetime.now().strftime('%Y%m%d%H%M%S')}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2, default=str))
+        return path
@@ -3,26 +3,108 @@ import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 from sklearn.preprocessing import MinMaxScaler
+from api.telemetry import span
 from config import config
 from datetime import datetime, timedelta
+import hashlib
+import json
+from pathlib import Path
+
+# Forest settings; part of the training fingerprint
+MODEL_PARAMS = {"n_estimators": 150, "max_depth": 12, "random_state": 42}
+TEST_SIZE = 0.2
+# Changes whenever this module changes, so edited training code retrains
+CODE_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+# Incremental updates add trees fit on the most recent rows to a forest
+INCREMENTAL_TREES = 25
+INCREMENTAL_WINDOW = 250
+MAX_INCREMENTAL_UPDATES = 20  # Force a full retrain after this many updates
+FEATURE_DRIFT_TOLERANCE = 0.1  # Fraction of a feature's trained span new bars may exceed it by
 
 class StockModelTrainer:
-    def __init__(self, symbol: str):
+    def __init__(self, symbol: str, n_jobs: int = -1):
         self.symbol = symbol
+        self.n_jobs = n_jobs  # Cores used to fit the forest
         self.scaler = MinMaxScaler(feature_range=(0, 1))
         self.window_size = 30
+        self.volume_window = 7  # Days averaged for the volume of predicted rows
+        self.features = None  # Feature columns the scaler was fitted on
+        self.origin = None  # First training date, anchors the 'day' feature
+        self.data_range = None
+        self.feature_range = None  # Per-feature (min, max) over every row trained on
+        self.incremental_updates = 0  # Updates since the last full fit
+
+    @classmethod
+    def from_bundle(cls, bundle: dict, n_jobs: int = -1) -> "StockModelTrainer":
+        """Restore the fitted feature pipeline saved with a model"""
+        trainer = cls(bundle["symbol"], n_jobs=n_jobs)
+        trainer.scaler = bundle["scaler"]
+        trainer.features = list(bundle["features"])
+        trainer.window_size = bundle["window_size"]
+        trainer.origin = bundle["origin"]
+        trainer.data_range = (bundle["data_start"], bundle["data_end"])
+        if "feature_min" in bundle:
+            trainer.feature_range = (bundle["feature_min"], bundle["feature_max"])
+        trainer.incremental_updates = bundle.get("incremental_updates", 0)
+        return trainer
+
+    def fingerprint(self, data: pd.DataFrame) -> str:
+        """Hash of everything that determines the trained model
+
+        Covers the symbol, row count, last bar date, the OHLCV values and
+        dates, the model settings and the training code version.
+        """
+        header = {
+            "symbol": self.symbol,
+            "rows": len(data),
+            "max_date": data.index.max().strftime("%Y-%m-%d") if len(data) else None,
+            "params": MODEL_PARAMS,
+            "test_size": TEST_SIZE,
+            "code_version": CODE_VERSION,
+        }
+        digest = hashlib.sha256(json.dumps(header, sort_keys=True).encode())
+        digest.update(np.ascontiguousarray(data.index.asi8).tobytes())
+        ohlcv = data[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy(dtype=float)
+        digest.update(np.ascontiguousarray(ohlcv).tobytes())
+        return digest.hexdigest()
+
+    def to_bundle(self, model, metrics: dict, fingerprint: str = None) -> dict:
+        """Package a trained model with everything needed to predict with it"""
+        trained_at = datetime.now()
+        return {
+            "symbol": self.symbol,
+            "estimator": model,
+            "scaler": self.scaler,
+            "features": self.features,
+            "window_size": self.window_size,
+            "origin": self.origin,
+            "data_start": self.data_range[0],
+            "data_end": self.data_range[1],
+            "feature_min": self.feature_range[0],
+            "feature_max": self.feature_range[1],
+            "metrics": metrics,
+            "trained_at": trained_at,
+            "model_version": trained_at.strftime("%Y%m%dT%H%M%S%f"),
+            "fingerprint": fingerprint,
+            "params": MODEL_PARAMS,
+            "code_version": CODE_VERSION,
+            "incremental_updates": self.incremental_updates,
+        }
 
     def _create_features(self, data: pd.DataFrame) -> pd.DataFrame:
         """Create time-series features"""
         data = data.copy()
-        data['day'] = (data.index - data.index.min()).days
+        origin = self.origin if self.origin is not None else data.index.min()
+        data['day'] = (data.index - origin).days
         data['day_of_week'] = data.index.dayofweek
         data['month'] = data.index.month
         data['volume_pct_change'] = data['Volume'].pct_change().fillna(0)
         return data.dropna(subset=['Close'])
 
-    def prepare_data(self, data: pd.DataFrame, test_size=0.2) -> tuple:
+    def prepare_data(self, data: pd.DataFrame, test_size=TEST_SIZE) -> tuple:
         """Prepare data with temporal split"""
+        self.origin = data.index.min()
         data = self._create_features(data)
 
         # Temporal split
@@ -41,6 +123,7 @@ class StockModelTrainer:
         features = data.drop(columns=['Close'])
         target = data['Close']
         if fit_scaler:
+            self.features = features.columns.tolist()
             self.scaler.fit(features)
         scaled_features = self.scaler.transform(features)
         return scaled_features, target.values
@@ -48,16 +131,13 @@ class StockModelTrainer:
     def train_model(self, data: pd.DataFrame) -> tuple:
         """Train and evaluate model with training and test data"""
         X_train, X_test, y_train, y_test = self.prepare_data(data)
+        self.data_range = (data.index.min(), data.index.max())
+        self.feature_range = self._feature_range(self._create_features(data))
 
         if len(X_train) < 100:
             raise ValueError("Insufficient data for training after preprocessing")
 
-        model = RandomForestRegressor(
-            n_estimators=150,
-            max_depth=12,
-            random_state=42,
-            n_jobs=-1
-        )
+        model = RandomForestRegressor(**MODEL_PARAMS, n_jobs=self.n_jobs)
         model.fit(X_train, y_train)
 
         # Evaluate on training data
@@ -84,35 +164,136 @@ class StockModelTrainer:
 
         return model, metrics
 
+    def full_retrain_reason(self, bundle: dict, data: pd.DataFrame):
+        """Why the bundle's model needs a full retrain on ``data``, or None
+
+        Call on a trainer restored from the same bundle.
+        """
+        if bundle.get("params") != MODEL_PARAMS or bundle.get("code_version") != CODE_VERSION:
+            return "model settings or training code changed"
+        if data.index.min() != self.data_range[0]:
+            return "history before the last training run changed"
+        if self.incremental_updates >= MAX_INCREMENTAL_UPDATES:
+            return f"{self.incremental_updates} incremental updates since the last full fit"
+
+        new_rows = self._create_features(data)
+        new_rows = new_rows[new_rows.index > self.data_range[1]]
+        if new_rows.empty:
+            return "stored bars changed but none were added"
+        if len(new_rows) > INCREMENTAL_WINDOW:
+            return f"{len(new_rows)} new bars, more than one update window"
+        if self.feature_range is None:
+            return "model was saved without its feature ranges"
+
+        # 'day' grows with every bar by construction, so it is not checked.
+        # The scaler only saw the training split, so compare against the
+        # range of every row the model was trained on instead.
+        low, high = self.feature_range
+        tolerance = FEATURE_DRIFT_TOLERANCE * (high - low)
+        checked = np.array([name != 'day' for name in self.features])
+        values = new_rows[self.features].to_numpy(dtype=float)[:, checked]
+        if (values < (low - tolerance)[checked]).any() or (values > (high + tolerance)[checked]).any():
+            return "new bars fall outside the trained feature range"
+        return None
+
+    def _feature_range(self, features: pd.DataFrame) -> tuple:
+        """Per-feature (min, max) of feature rows"""
+        values = features[self.features].to_numpy(dtype=float)
+        return np.nanmin(values, axis=0), np.nanmax(values, axis=0)
+
+    def update_model(self, model, data: pd.DataFrame) -> tuple:
+        """Add trees fit on the most recent rows to an already trained forest
+
+        The fitted scaler and features are reused, so call this on a trainer
+        restored with from_bundle. Metrics are measured on the new bars
+        before the update, which the existing forest has never seen.
+        """
+        features = self._create_features(data)
+        new_rows = features[features.index > self.data_range[1]]
+        if new_rows.empty:
+            raise ValueError("No new bars since the model was trained")
+
+        X_new, y_new = self._transform_data(new_rows, fit_scaler=False)
+        new_predictions = model.predict(X_new)
+        test_metrics = {
+            "mse": mean_squared_error(y_new, new_predictions),
+            "rmse": np.sqrt(mean_squared_error(y_new, new_predictions)),
+            "mae": mean_absolute_error(y_new, new_predictions),
+        }
+
+        X_recent, y_recent = self._transform_data(features.iloc[-INCREMENTAL_WINDOW:], fit_scaler=False)
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + INCREMENTAL_TREES,
+                         n_jobs=self.n_jobs)
+        model.fit(X_recent, y_recent)
+        model.set_params(warm_start=False)
+
+        self.data_range = (self.data_range[0], data.index.max())
+        low, high = self._feature_range(new_rows)
+        self.feature_range = (np.minimum(low, self.feature_range[0]), np.maximum(high, self.feature_range[1]))
+        self.incremental_updates += 1
+
+        metrics = {
+            "test": test_metrics,
+            "model_type": "RandomForest (incremental)"
+        }
+        return model, metrics
+
     def predict_future(self, model, data: pd.DataFrame, days: int) -> dict:
-        """Generate future predictions"""
+        """Generate future predictions
+
+        Each step only builds the feature row for the newly predicted day.
+        The last ``volume_window`` feature rows are kept in a fixed-size ring
+        buffer, so the cost per step does not depend on the history length.
+        """
+        if self.features is None:
+            raise ValueError("Model pipeline is not fitted, train or load a bundle first")
+        if self.origin is None:
+            self.origin = data.index.min()
+
+        column = {name: i for i, name in enumerate(self.features)}
+        scale, offset = self.scaler.scale_, self.scaler.min_
+
+        # Seed the ring buffer with the most recent real feature rows
+        with span("forecast.features"):
+            recent = self._create_features(data.iloc[-(self.volume_window + 1):])
+            recent = recent[self.features].to_numpy(dtype=float)[-self.volume_window:]
+            ring = np.zeros((self.volume_window, len(self.features)))
+            filled = len(recent)
+            ring[:filled] = recent
+            pos = filled % self.volume_window
+            row = recent[-1].copy()
+
+        X = np.empty((1, len(self.features)))
+        last_date = data.index[-1]
         predictions = {}
-        current_data = data.copy()
-        
-        for _ in range(days):
-            # Prepare features for prediction
-            features = self._create_features(current_data)
-            features = features.iloc[-1:].drop(columns=['Close'], errors='ignore')
-            
-            # Generate prediction
-            scaled_features = self.scaler.transform(features)
-            pred = model.predict(scaled_features)[0]
-            
-            # Create new date
-            last_date = current_data.index[-1]
-            new_date = last_date + timedelta(days=1)
-            
-            # Create new row with predicted values
-            new_row = {
-                'Open': pred * 0.995,
-                'High': pred * 1.01,
-                'Low': pred * 0.99,
-                'Close': pred,
-                'Volume': current_data['Volume'].iloc[-7:].mean()
-            }
-            
-            # Update data for recursive prediction
-            current_data = current_data.append(pd.DataFrame([new_row], index=[new_date]))
-            predictions[new_date.strftime("%Y-%m-%d")] = round(pred, 2)
-            
-        return predictions
\ No newline at end of file
+
+        with span("forecast.loop"):
+            for _ in range(days):
+                # Scale the latest feature row into the preallocated input
+                np.multiply(row, scale, out=X[0])
+                X[0] += offset
+                if self.scaler.clip:
+                    np.clip(X[0], *self.scaler.feature_range, out=X[0])
+                pred = float(model.predict(X)[0])
+
+                new_date = last_date + timedelta(days=1)
+                predictions[new_date.strftime("%Y-%m-%d")] = round(pred, 2)
+
+                # Build the feature row for the predicted day
+                prev_volume = row[column['Volume']]
+                volume = ring[:filled, column['Volume']].mean()
+                row[column['Open']] = pred * 0.995
+                row[column['High']] = pred * 1.01
+                row[column['Low']] = pred * 0.99
+                row[column['Volume']] = volume
+                row[column['day']] = (new_date - self.origin).days
+                row[column['day_of_week']] = new_date.dayofweek
+                row[column['month']] = new_date.month
+                row[column['volume_pct_change']] = volume / prev_volume - 1 if prev_volume else 0.0
+
+                ring[pos] = row
+                pos = (pos + 1) % self.volume_window
+                filled = min(filled + 1, self.volume_window)
+                last_date = new_date
+
+        return predictions
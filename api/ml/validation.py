@@ -1,4 +1,7 @@
 # api/ml/validation.py
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
@@ -8,6 +11,7 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from Stock_Analysis_ML.api.database import ModelStore
 from Stock_Analysis_ML.api.ml.metrics import StockModelTrainer
+from Stock_Analysis_ML.api.ml import training
 from config import config
 import sys
 from pathlib import Path
@@ -15,6 +19,66 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent.parent
 sys.path.append(str(project_root))
 
+def walk_forward_folds(n_rows: int, window_size: int, refit_every: int, window: str) -> list:
+    """(train, test) row slices for each refit of a walk-forward run"""
+    folds = []
+    for start in range(window_size, n_rows, refit_every):
+        train_start = 0 if window == "expanding" else start - window_size
+        folds.append((slice(train_start, start), slice(start, min(start + refit_every, n_rows))))
+    return folds
+
+def fit_predict_fold(X, y, train: slice, test: slice, seed: int, n_estimators: int,
+                     max_depth: int, n_jobs: int = -1) -> np.ndarray:
+    """Fit a forest on the train rows and predict the test rows"""
+    model = RandomForestRegressor(
+        n_estimators=n_estimators,
+        max_depth=max_depth,
+        random_state=seed,
+        n_jobs=n_jobs
+    )
+    model.fit(X[train], y[train])
+    return model.predict(X[test])
+
+# Feature arrays mapped from shared memory in each worker process
+_shared_arrays = {}
+
+def _attach_shared_arrays(specs: dict):
+    """Worker initializer: map the parent's arrays without copying them"""
+    for name, (shm_name, shape, dtype) in specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _shared_arrays[name] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+def _fit_predict_shared_fold(task: tuple) -> np.ndarray:
+    train, test, seed, n_estimators, max_depth = task
+    X, y = _shared_arrays["X"][1], _shared_arrays["y"][1]
+    return fit_predict_fold(X, y, train, test, seed, n_estimators, max_depth, n_jobs=1)
+
+def fit_predict_folds_parallel(X, y, folds: list, seeds: list, n_estimators: int,
+                               max_depth: int, n_jobs: int) -> list:
+    """Run folds across a process pool, returning predictions in fold order
+
+    X and y are copied once into shared memory, so tasks only carry slices
+    and seeds. Each forest is single-threaded to avoid oversubscription.
+    """
+    blocks, specs = [], {}
+    try:
+        for name, array in (("X", X), ("y", y)):
+            shm = shared_memory.SharedMemory(create=True, size=array.nbytes)
+            blocks.append(shm)
+            np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+            specs[name] = (shm.name, array.shape, array.dtype.str)
+
+        tasks = [(train, test, seed, n_estimators, max_depth)
+                 for (train, test), seed in zip(folds, seeds)]
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=_attach_shared_arrays,
+                                 initargs=(specs,)) as pool:
+            chunksize = max(1, len(tasks) // (n_jobs * 4))
+            return list(pool.map(_fit_predict_shared_fold, tasks, chunksize=chunksize))
+    finally:
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
 class ModelValidator:
     def __init__(self, symbol: str):
         self.symbol = symbol
@@ -34,36 +98,55 @@ class ModelValidator:
         plt.close()
         return plot_path
 
-    def walk_forward_validation(self, data: pd.DataFrame, window_size=200):
-        test_metrics = []
-        predictions = []
-        actuals = []
-        
-        for i in range(window_size, len(data)):
-            train = data.iloc[:i]
-            test = data.iloc[i:i+1]
-            
-            # Train model
-            trainer = StockModelTrainer(self.symbol)
-            X_train, y_train = trainer.prepare_data(train)
-            print(f"X_train shape: {X_train.shape}, y_train shape: {y_train.shape}")  # Debug print
-            model = RandomForestRegressor(n_estimators=100, max_depth=10)
-            model.fit(X_train, y_train)
-            
-            # Predict
-            X_test, y_test = trainer.prepare_data(test)
-            print(f"X_test shape: {X_test.shape}, y_test shape: {y_test.shape}")  # Debug print
-            pred = model.predict(X_test)
-            
-            # Store results
-            predictions.append(pred[0])
-            actuals.append(y_test[0])
-            test_metrics.append({
-                'date': test.index[-1].strftime("%Y-%m-%d"),
-                'actual': y_test[0],
-                'predicted': pred[0],
-                'error': y_test[0] - pred[0]
-            })
+    def walk_forward_validation(self, data: pd.DataFrame, window_size=200, refit_every=1,
+                                window="expanding", n_estimators=100, max_depth=10, random_state=42,
+                                n_jobs=1):
+        """Walk-forward validation with a configurable refit stride
+
+        The feature matrix is built once and shared by all folds. A model is
+        refit every ``refit_every`` days and predicts the days up to the next
+        refit. With window="expanding" each fold trains on all earlier days,
+        with window="sliding" only on the last ``window_size`` days.
+        With ``n_jobs`` other than 1 the folds run in a process pool
+        (-1 uses every core); results do not depend on ``n_jobs``.
+        """
+        if window not in ("expanding", "sliding"):
+            raise ValueError(f"Unknown window type: {window}")
+        if refit_every < 1:
+            raise ValueError("refit_every must be at least 1")
+
+        # Trees only compare feature thresholds, so the min-max scaling used
+        # in training does not change the fitted splits and is skipped here
+        features = training.StockModelTrainer(self.symbol)._create_features(data)
+        X = features.drop(columns=['Close']).to_numpy(dtype=float)
+        y = features['Close'].to_numpy(dtype=float)
+        if len(X) <= window_size:
+            raise ValueError(f"Need more than {window_size} rows for walk-forward validation")
+
+        folds = walk_forward_folds(len(X), window_size, refit_every, window)
+        seeds = [random_state + fold for fold in range(len(folds))]
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        if n_jobs > 1:
+            fold_predictions = fit_predict_folds_parallel(X, y, folds, seeds, n_estimators,
+                                                          max_depth, n_jobs)
+        else:
+            fold_predictions = [
+                fit_predict_fold(X, y, train, test, seed, n_estimators, max_depth)
+                for (train, test), seed in zip(folds, seeds)
+            ]
+        predictions = np.concatenate(fold_predictions)
+        actuals = y[window_size:]
+
+        test_metrics = [
+            {
+                'date': date.strftime("%Y-%m-%d"),
+                'actual': actual,
+                'predicted': pred,
+                'error': actual - pred
+            }
+            for date, actual, pred in zip(features.index[window_size:], actuals, predictions)
+        ]
 
         # Calculate final metrics
         mae = mean_absolute_error(actuals, predictions)
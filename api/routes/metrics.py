@@ -1,54 +1,76 @@
 # api/routes/metrics.py
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from datetime import datetime, timezone
+import json
+from fastapi.concurrency import run_in_threadpool
+from api.charts import metrics_series, render_metrics_chart
 from api.database import DatabaseManager
+from api.http_cache import cache_headers, is_not_modified, make_etag, not_modified, response_cache
 from api.schemas import ModelMetrics
-import matplotlib.pyplot as plt
-import io
-import base64
+from api.telemetry import span
+from api.workers import single_flight
 
 router = APIRouter(prefix="/api/py/metrics", tags=["metrics"])
 
 @router.get("/{symbol}", response_model=list[ModelMetrics])
-def get_metrics(symbol: str):
+def get_metrics(request: Request, symbol: str):
     try:
-        with DatabaseManager.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT symbol, model_type, mse, rmse, mae, created_at
-                FROM metrics
-                WHERE symbol = ?
-                ORDER BY created_at DESC
-            """, (symbol,))
-            return [dict(row) for row in cursor.fetchall()]
+        latest, count = DatabaseManager.metrics_stats(symbol)
+        etag = make_etag("metrics", symbol, latest, count)
+        last_modified = datetime.fromisoformat(latest).astimezone(timezone.utc) if latest else None
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        headers = cache_headers(etag, last_modified)
+
+        body = response_cache.get(etag)
+        if body is None:
+            metrics = DatabaseManager.fetch_model_metrics(symbol)
+            with span("metrics.serialize"):
+                for m in metrics:
+                    m["created_at"] = datetime.fromisoformat(m["created_at"]).isoformat()
+                body = json.dumps(metrics, separators=(",", ":")).encode()
+            response_cache.put(etag, body)
+        return Response(body, media_type="application/json", headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/chart/{symbol}")
-def get_metrics_chart(symbol: str):
+async def get_metrics_chart(request: Request, symbol: str, shape: str = Query("png", alias="format")):
+    """RMSE/MAE history of a symbol's models
+
+    format=png (default) returns {"chart": <base64 PNG>}; format=data returns
+    the plotted series {"symbol", "dates", "rmse", "mae"} for client-side
+    rendering. Metrics only change after a retrain, so rendered charts are
+    cached by (symbol, latest created_at).
+    """
+    if shape not in ("png", "data"):
+        raise HTTPException(status_code=400, detail="format must be png or data")
     try:
-        metrics = get_metrics(symbol)
-        if not metrics:
+        latest, count = await run_in_threadpool(DatabaseManager.metrics_stats, symbol)
+        if not count:
             raise HTTPException(status_code=404, detail="No metrics found")
-        
-        dates = [m['created_at'] for m in metrics]
-        rmse_values = [m['rmse'] for m in metrics]
-        mae_values = [m['mae'] for m in metrics]
+        etag = make_etag("chart", symbol, latest, count, shape)
+        last_modified = datetime.fromisoformat(latest).astimezone(timezone.utc)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified(etag, last_modified)
+        headers = cache_headers(etag, last_modified)
 
-        plt.figure(figsize=(10, 6))
-        plt.plot(dates, rmse_values, label='RMSE')
-        plt.plot(dates, mae_values, label='MAE')
-        plt.xlabel('Training Date')
-        plt.ylabel('Error Value')
-        plt.title(f'Model Performance Over Time - {symbol}')
-        plt.legend()
-        plt.xticks(rotation=45)
-        
-        buf = io.BytesIO()
-        plt.savefig(buf, format='png', bbox_inches='tight')
-        buf.seek(0)
-        plt.close()
-        
-        return {"chart": base64.b64encode(buf.read()).decode('utf-8')}
-        
+        body = response_cache.get(etag)
+        if body is None:
+            metrics = await run_in_threadpool(DatabaseManager.fetch_model_metrics, symbol)
+            if shape == "data":
+                content = {"symbol": symbol, **metrics_series(metrics)}
+            else:
+                # Rendering is CPU bound, so it runs in the worker processes
+                with span("metrics.chart"):
+                    chart = await single_flight.run(("chart", symbol, latest, count),
+                                                    render_metrics_chart, symbol, metrics)
+                content = {"chart": chart}
+            body = json.dumps(content, separators=(",", ":")).encode()
+            response_cache.put(etag, body)
+        return Response(body, media_type="application/json", headers=headers)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
@@ -1,50 +1,169 @@
 # api/routes/stocks.py
-from fastapi import APIRouter, HTTPException
-from datetime import datetime, timedelta
-import pandas as pd
-from api.database import DatabaseManager, ModelStore
-from api.ml.training import StockModelTrainer
-from api.schemas import StockData, PredictionResult
-from config import config
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime, timezone
+import asyncio
+import itertools
+import json
+from typing import Optional
+from api.database import DatabaseManager, ModelStore, OHLCV_COLUMNS
+from api.http_cache import cache_headers, is_not_modified, make_etag, not_modified, response_cache
+from api.ml.forecasting import forecast_symbol
+from api.telemetry import span
+from api.workers import single_flight
+from api.streaming import MEDIA_TYPES, STREAM_WRITERS, iter_bar_chunks, negotiate_format, require_pyarrow
+from api.schemas import PredictionResult, BatchPredictionRequest
 
 router = APIRouter(prefix="/api/py/stock", tags=["stocks"])
 
-@router.get("/{symbol}", response_model=dict[str, StockData])
-def get_stock_data(symbol: str):
+@router.get("/{symbol}")
+def get_stock_data(request: Request, symbol: str, start: Optional[str] = None, end: Optional[str] = None,
+                   columns: Optional[str] = None, limit: Optional[int] = None,
+                   shape: Optional[str] = Query(None, alias="format"),
+                   accept: Optional[str] = Header(None)):
+    """Stored bars, optionally filtered by date range, columns and count
+
+    format=records (default) returns {date: {column: value}}; format=columnar
+    returns parallel arrays {"dates": [...], "<column>": [...]}. csv, arrow
+    (IPC stream), arrow_file (IPC file) and parquet are streamed in chunks;
+    they can also be chosen with the Accept header (text/csv,
+    application/vnd.apache.arrow.stream, application/vnd.apache.arrow.file,
+    application/vnd.apache.parquet).
+
+    Responses carry an ETag built from the symbol's last bar date and bar
+    count, so they only change when new bars are stored; conditional
+    requests get a 304 and JSON bodies are served from the response cache.
+    """
+    shape = negotiate_format(shape, accept)
     try:
-        data = DatabaseManager.fetch_historical_data(symbol)
-        if not data:
+        query = parse_bar_query(start, end, columns, limit)
+        if shape not in ("records", "columnar", *STREAM_WRITERS):
+            raise ValueError(f"format must be one of records, columnar, {', '.join(STREAM_WRITERS)}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    last_date, count = DatabaseManager.bar_stats(symbol)
+    if not count:
+        raise HTTPException(status_code=404, detail="No data found")
+    etag = make_etag("bars", symbol, last_date, count, shape, sorted(query.items(), key=str))
+    last_modified = datetime.strptime(last_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified(etag, last_modified)
+    headers = cache_headers(etag, last_modified)
+
+    if shape in STREAM_WRITERS:
+        return stream_stock_data(symbol, query, shape, headers)
+
+    body = response_cache.get(etag)
+    if body is not None:
+        return Response(body, media_type="application/json", headers=headers)
+
+    try:
+        rows, selected = DatabaseManager.fetch_historical_rows(symbol, **query)
+        if not rows:
             raise HTTPException(status_code=404, detail="No data found")
-        return data
+
+        # Rows come straight from SQLite, so skip per-row model validation
+        with span("stocks.serialize"):
+            if shape == "columnar":
+                values = list(zip(*rows))
+                content = {"symbol": symbol, "dates": values[0]}
+                content.update({column: values[i + 1] for i, column in enumerate(selected)})
+            else:
+                content = {row[0]: dict(zip(selected, row[1:])) for row in rows}
+            body = json.dumps(content, separators=(",", ":")).encode()
+        response_cache.put(etag, body)
+        return Response(body, media_type="application/json", headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def stream_stock_data(symbol: str, query: dict, fmt: str, headers: Optional[dict] = None) -> StreamingResponse:
+    try:
+        require_pyarrow(fmt)
+    except ImportError:
+        raise HTTPException(status_code=406, detail=f"{fmt} output needs pyarrow installed on the server")
+
+    chunks = iter_bar_chunks(symbol, query)
+    first = next(chunks, None)
+    if first is None:
+        raise HTTPException(status_code=404, detail="No data found")
+
+    columns = query["columns"] or list(OHLCV_COLUMNS)
+    body = STREAM_WRITERS[fmt](itertools.chain([first], chunks), columns)
+    extension = {"csv": "csv", "arrow": "arrows", "arrow_file": "arrow", "parquet": "parquet"}[fmt]
+    return StreamingResponse(body, media_type=MEDIA_TYPES[fmt], headers={
+        **(headers or {}),
+        "Content-Disposition": f'attachment; filename="{symbol}.{extension}"'
+    })
+
+def parse_bar_query(start: Optional[str], end: Optional[str], columns: Optional[str],
+                    limit: Optional[int]) -> dict:
+    """Validate the bar query parameters shared by the data endpoints"""
+    for value in (start, end):
+        if value is not None:
+            datetime.strptime(value, "%Y-%m-%d")
+    if limit is not None and limit <= 0:
+        raise ValueError("limit must be positive")
+    selected = None
+    if columns:
+        selected = [name.strip().capitalize() for name in columns.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in OHLCV_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {unknown}, expected some of {list(OHLCV_COLUMNS)}")
+    return {"start": start, "end": end, "columns": selected, "limit": limit}
+
+# Inference runs in the worker process pool, and identical requests that
+# arrive while one is in flight share its result
 @router.get("/predict/{symbol}", response_model=PredictionResult)
-def predict_stock_price(symbol: str, days: int = 7):
+async def predict_stock_price(symbol: str, days: int = 7):
+    if days <= 0:
+        raise HTTPException(status_code=400, detail="days must be positive")
+    model_mtime = ModelStore.model_mtime(symbol)
+    if model_mtime is None:
+        raise HTTPException(status_code=404, detail="Model not found")
     try:
-        # Load model and data
-        model = ModelStore.load_model(symbol)
-        data = DatabaseManager.fetch_historical_data(symbol)
-        
-        if not model:
-            raise HTTPException(status_code=404, detail="Model not found")
-        if not data:
-            raise HTTPException(status_code=404, detail="Data not found")
-            
-        # Prepare data
-        df = pd.DataFrame.from_dict(data, orient='index')
-        df.index = pd.to_datetime(df.index)
-        df = df.sort_index()
-        
-        # Generate predictions
-        trainer = StockModelTrainer(symbol)
-        predictions = trainer.predict_future(model, df, days)
+        with span("stocks.predict"):
+            result = await single_flight.run(("predict", symbol, (days,), model_mtime),
+                                             forecast_symbol, symbol, [days])
+        if "error" in result:
+            raise HTTPException(status_code=404, detail=result["error"])
         
         return {
             "symbol": symbol,
-            "predictions": predictions,
-            "last_updated": datetime.now().isoformat()
+            "predictions": result["forecasts"][str(days)],
+            "last_updated": datetime.now().isoformat(),
+            "model_version": result["model_version"],
+            "last_data_date": result["last_data_date"],
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Streams one JSON line per symbol as soon as its forecast is ready. Like the
+# single predict endpoint, the forecasts run in the worker process pool
+@router.post("/predict/batch")
+async def predict_batch(request: BatchPredictionRequest):
+    if not request.symbols:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if not request.horizons or min(request.horizons) <= 0:
+        raise HTTPException(status_code=400, detail="Horizons must be positive")
+
+    symbols = list(dict.fromkeys(request.symbols))
+    horizons = sorted(set(request.horizons))
+
+    async def forecast(symbol: str) -> dict:
+        key = ("predict", symbol, tuple(horizons), ModelStore.model_mtime(symbol))
+        try:
+            return await single_flight.run(key, forecast_symbol, symbol, horizons)
+        except Exception as e:
+            return {"symbol": symbol, "error": str(e)}
+
+    async def lines():
+        for result in asyncio.as_completed([forecast(symbol) for symbol in symbols]):
+            yield json.dumps(await result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,26 @@
+# api/routes/system.py
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from api.database import get_pool
+from api.http_cache import response_cache
+from api.telemetry import registry
+from api.workers import single_flight, worker_stats
+
+router = APIRouter(prefix="/api/py/system", tags=["system"])
+
+@router.get("/stats")
+def get_stats():
+    # Forecasts and charts run in the worker processes, so the model caches
+    # that matter are theirs; each worker reports its stats with every result
+    return {
+        "db_pool": get_pool().stats(),
+        "response_cache": response_cache.stats(),
+        "workers": worker_stats(),
+        "single_flight": single_flight.stats(),
+    }
+
+# Prometheus scrape target: per-request latency by route and per-stage
+# latency (SQLite reads, model loads, feature building, forecasting)
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_prometheus_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,5 +1,6 @@
 # api/schemas.py
 from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel
 
 class StockData(BaseModel):
@@ -14,6 +15,8 @@ class PredictionResult(BaseModel):
     symbol: str
     predictions: dict
     last_updated: datetime
+    model_version: Optional[str] = None
+    last_data_date: Optional[str] = None
 
 class ModelMetrics(BaseModel):
     symbol: str
@@ -21,4 +24,8 @@ class ModelMetrics(BaseModel):
     mse: float
     rmse: float
     mae: float
-    created_at: datetime
\ No newline at end of file
+    created_at: datetime
+
+class BatchPredictionRequest(BaseModel):
+    symbols: list[str]
+    horizons: list[int] = [7]
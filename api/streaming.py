@@ -0,0 +1,137 @@
+# api/streaming.py
+import csv
+import io
+from typing import Iterator, List, Optional
+from api.database import DatabaseManager, OHLCV_COLUMNS, get_connection
+from config import config
+
+# Streamed response formats and the media types that select them
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "arrow_file": "application/vnd.apache.arrow.file",
+    "parquet": "application/vnd.apache.parquet",
+}
+ACCEPT_ALIASES = {
+    "application/x-parquet": "parquet",
+}
+
+
+def negotiate_format(requested: Optional[str], accept: Optional[str], default: str = "records") -> str:
+    """Response format from an explicit ?format= or else the Accept header"""
+    if requested:
+        return requested
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        for name, streamed_type in MEDIA_TYPES.items():
+            if media_type == streamed_type:
+                return name
+        if media_type in ACCEPT_ALIASES:
+            return ACCEPT_ALIASES[media_type]
+    return default
+
+
+def require_pyarrow(fmt: str):
+    """Raise ImportError early, before a streaming response has started"""
+    if fmt in ("arrow", "arrow_file", "parquet"):
+        import pyarrow  # noqa: F401
+
+
+def iter_bar_chunks(symbol: str, query: dict) -> Iterator[list]:
+    """Yield bars in chunks of config.stream_chunk_rows straight off the cursor"""
+    sql, params, _ = DatabaseManager.historical_query(symbol, **query)
+    with get_connection(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(config.stream_chunk_rows)
+            if not rows:
+                break
+            yield rows
+
+
+class _ChunkBuffer(io.BytesIO):
+    """Byte sink for the Arrow writers that is emptied after every chunk"""
+
+    def close(self):
+        # Writers close their sink when finishing; keep it readable for the footer
+        pass
+
+    def drain(self) -> bytes:
+        data = self.getvalue()
+        self.seek(0)
+        self.truncate()
+        return data
+
+
+def stream_csv(chunks: Iterator[list], columns: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Date", *columns])
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _arrow_schema(columns: List[str]):
+    import pyarrow as pa
+    types = {"f8": pa.float64(), "i8": pa.int64()}
+    return pa.schema([("Date", pa.date32())] + [(c, types[OHLCV_COLUMNS[c][1]]) for c in columns])
+
+
+def _record_batch(rows: list, schema):
+    import pyarrow as pa
+    values = list(zip(*rows))
+    arrays = [pa.array(values[0], pa.string()).cast(pa.date32())]
+    arrays += [pa.array(column, schema.field(i + 1).type) for i, column in enumerate(values[1:])]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def stream_arrow(chunks: Iterator[list], columns: List[str]) -> Iterator[bytes]:
+    """Arrow IPC stream, one record batch per chunk"""
+    import pyarrow as pa
+    schema = _arrow_schema(columns)
+    sink = _ChunkBuffer()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for rows in chunks:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_arrow_file(chunks: Iterator[list], columns: List[str]) -> Iterator[bytes]:
+    """Arrow IPC file (random access) format, footer sent last"""
+    import pyarrow as pa
+    schema = _arrow_schema(columns)
+    sink = _ChunkBuffer()
+    with pa.ipc.new_file(sink, schema) as writer:
+        for rows in chunks:
+            writer.write_batch(_record_batch(rows, schema))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def stream_parquet(chunks: Iterator[list], columns: List[str]) -> Iterator[bytes]:
+    """Parquet file, one row group per chunk, footer sent last"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    schema = _arrow_schema(columns)
+    sink = _ChunkBuffer()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for rows in chunks:
+            writer.write_table(pa.Table.from_batches([_record_batch(rows, schema)]))
+            yield sink.drain()
+    yield sink.drain()
+
+
+STREAM_WRITERS = {
+    "csv": stream_csv,
+    "arrow": stream_arrow,
+    "arrow_file": stream_arrow_file,
+    "parquet": stream_parquet,
+}
@@ -0,0 +1,153 @@
+# api/telemetry.py
+from contextlib import contextmanager
+from contextvars import ContextVar
+import functools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; SQLite point reads land in the first buckets,
+# cold model loads and long forecasts in the last ones
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (stage, seconds) spans of the request being handled, None outside requests
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus layout"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+
+class Registry:
+    """Histograms per metric name and label set"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, tuple], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """All histograms in the Prometheus text exposition format"""
+        lines, seen = [], set()
+        with self._lock:
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                if name not in seen:
+                    seen.add(name)
+                    lines.append(f"# TYPE {name} histogram")
+                label_text = ",".join(f'{key}="{value}"' for key, value in labels)
+                prefix = f"{label_text}," if label_text else ""
+                cumulative = 0
+                for bound, count in zip(BUCKETS, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {histogram.count}')
+                suffix = f"{{{label_text}}}" if label_text else ""
+                lines.append(f"{name}_sum{suffix} {histogram.sum:.6f}")
+                lines.append(f"{name}_count{suffix} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def record_spans(spans: List[Tuple[str, float]], observe: bool = True):
+    """Add spans measured elsewhere (e.g. in a worker process) to this request"""
+    if observe:
+        for stage, seconds in spans:
+            registry.observe("stock_api_stage_seconds", seconds, stage=stage)
+    current = _request_spans.get()
+    if current is not None:
+        current.extend(spans)
+
+
+@contextmanager
+def span(stage: str):
+    """Time a stage into its histogram and the current request's breakdown"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_spans([(stage, time.perf_counter() - started)])
+
+
+def timed(stage: str):
+    """Decorator form of span"""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def traced_call(fn, *args):
+    """Run fn collecting its spans, for work shipped to another process
+
+    Returns (result, spans) so the caller can attach the spans to the
+    request that asked for the work.
+    """
+    spans = []
+    token = _request_spans.set(spans)
+    try:
+        return fn(*args), spans
+    finally:
+        _request_spans.reset(token)
+
+
+@contextmanager
+def request_scope(rid: str):
+    """Collect the spans of one request; yields the list they go into"""
+    spans = []
+    spans_token = _request_spans.set(spans)
+    id_token = request_id.set(rid)
+    try:
+        yield spans
+    finally:
+        _request_spans.reset(spans_token)
+        request_id.reset(id_token)
+
+
+def configure_logging(level: str = "INFO"):
+    """Send request breakdowns to stderr next to uvicorn's own logs
+
+    Nothing configures the root logger under uvicorn, so without a handler
+    of its own this logger's INFO records would be dropped.
+    """
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(levelname)s:     %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+
+
+def log_request(rid: str, method: str, path: str, status: int, seconds: float,
+                spans: List[Tuple[str, float]]):
+    breakdown = " ".join(f"{stage}={seconds * 1000:.2f}ms" for stage, seconds in spans)
+    logger.info("request_id=%s %s %s %s %.2fms %s", rid, method, path, status,
+                seconds * 1000, breakdown)
@@ -0,0 +1,135 @@
+# api/workers.py
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import os
+import threading
+from typing import Callable, Dict, Hashable, Optional
+from api.telemetry import record_spans, registry, traced_call
+from config import config
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+# Pool and model cache stats of each live worker, as of its latest call
+_worker_stats: Dict[int, dict] = {}
+
+
+def _init_worker(settings: dict):
+    # Spawned workers import config afresh; apply the parent's settings so
+    # paths changed at runtime (e.g. by the benchmarks) are honoured
+    vars(config).update(settings)
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Bounded process pool for CPU-bound work (inference, chart rendering)
+
+    Workers are spawned rather than forked so they never inherit the
+    parent's open SQLite connections or matplotlib state.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=config.cpu_workers,
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=_init_worker, initargs=(dict(vars(config)),))
+        return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    """Drop a broken pool so the next get_process_pool starts a new one"""
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+            _worker_stats.clear()
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _call_in_worker(fn: Callable, *args):
+    """Run fn in a worker; returns (result, spans, worker pid, worker stats)"""
+    from api.database import get_pool, model_cache
+    result, spans = traced_call(fn, *args)
+    return result, spans, os.getpid(), {"db_pool": get_pool().stats(), "model_cache": model_cache.stats()}
+
+
+async def run_in_pool(fn: Callable, *args):
+    """Run fn in the process pool, replacing the pool if a worker died
+
+    A worker killed mid-task (e.g. by the OOM killer) breaks the whole
+    executor. The call is retried once on a fresh pool; a task that breaks
+    the new pool as well raises BrokenProcessPool.
+    """
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = get_process_pool()
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            _discard_pool(pool)
+            if attempt:
+                raise
+
+
+def shutdown_process_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+            _worker_stats.clear()
+
+
+def worker_stats() -> Dict[str, dict]:
+    """Connection pool and model cache stats reported by each worker"""
+    with _pool_lock:
+        return {str(pid): stats for pid, stats in _worker_stats.items()}
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one computation
+
+    The first caller for a key starts the work in the process pool; callers
+    arriving while it runs await the same future and share its result (or
+    exception). Nothing is kept once the call finishes. Stage timings
+    recorded in the worker are observed once and added to every waiting
+    request's breakdown.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable, *args):
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(run_in_pool(_call_in_worker, fn, *args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+        # shield so one client disconnecting does not cancel the others' result
+        result, spans, _, _ = await asyncio.shield(future)
+        record_spans(spans, observe=False)
+        return result
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            _, spans, pid, stats = future.result()
+            with _pool_lock:
+                _worker_stats[pid] = stats
+            for stage, seconds in spans:
+                registry.observe("stock_api_stage_seconds", seconds, stage=stage)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "inflight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,264 @@
+# benchmarks/run.py
+"""End-to-end benchmarks on synthetic data
+
+Times (and with tracemalloc, peak Python memory of) the storage, training,
+model store, validation and API paths against a throwaway database and
+model directory. Nothing touches the network or the real database.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --symbols 5 --years 10 --compare reports/benchmark_<time>.json
+"""
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import os
+from pathlib import Path
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = Path(__file__).resolve().parent.parent
+# validation.py imports the package as Stock_Analysis_ML.api
+sys.path[:0] = [str(ROOT), str(ROOT.parent)]
+
+from config import config
+from benchmarks.synthetic import synthetic_bars, synthetic_symbols, to_records
+
+
+class BenchmarkRun:
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.results = []
+
+    @contextmanager
+    def measure(self, name: str, **info):
+        """Record wall time and peak traced memory of the enclosed block"""
+        if self.trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            yield info
+        finally:
+            seconds = time.perf_counter() - started
+            result = {"name": name, "seconds": round(seconds, 6), **info}
+            if self.trace_memory:
+                result["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 3)
+                tracemalloc.stop()
+            self.results.append(result)
+            print(f"{name:<36} {seconds:9.4f}s"
+                  + (f" {result['peak_mb']:9.1f} MB" if self.trace_memory else ""))
+
+
+def bench_storage(run: BenchmarkRun, frames: dict):
+    from api.database import DatabaseManager
+    records = {symbol: to_records(frame) for symbol, frame in frames.items()}
+    rows = sum(len(frame) for frame in frames.values())
+
+    with run.measure("save_historical_data", rows=rows):
+        for symbol, data in records.items():
+            DatabaseManager.save_historical_data(symbol, data)
+    with run.measure("fetch_historical_data", rows=rows):
+        for symbol in frames:
+            DatabaseManager.fetch_historical_data(symbol)
+    with run.measure("fetch_historical_frame", rows=rows):
+        for symbol in frames:
+            DatabaseManager.fetch_historical_frame(symbol)
+
+
+def bench_model(run: BenchmarkRun, symbols: list, horizon: int):
+    from api.database import DatabaseManager, ModelStore
+    from api.ml.training import StockModelTrainer
+
+    frames = {symbol: DatabaseManager.fetch_historical_frame(symbol) for symbol in symbols}
+    trainers = {symbol: StockModelTrainer(symbol) for symbol in symbols}
+    models = {}
+
+    with run.measure("prepare_data", symbols=len(symbols)):
+        for symbol in symbols:
+            trainers[symbol].prepare_data(frames[symbol])
+    with run.measure("train_model", symbols=len(symbols)):
+        for symbol in symbols:
+            models[symbol] = trainers[symbol].train_model(frames[symbol])
+    with run.measure("predict_future", symbols=len(symbols), days=horizon):
+        for symbol in symbols:
+            trainers[symbol].predict_future(models[symbol][0], frames[symbol], horizon)
+
+    bundles = {}
+    for symbol in symbols:
+        model, metrics = models[symbol]
+        fingerprint = trainers[symbol].fingerprint(frames[symbol])
+        DatabaseManager.save_model_metrics(symbol, {**metrics["test"], "model_type": metrics["model_type"],
+                                                    "fingerprint": fingerprint})
+        bundles[symbol] = trainers[symbol].to_bundle(model, metrics, fingerprint)
+
+    with run.measure("ModelStore.save_bundle", symbols=len(symbols)) as info:
+        for symbol in symbols:
+            ModelStore.save_bundle(symbol, bundles[symbol])
+        info["bytes"] = sum(ModelStore.model_path(symbol).stat().st_size for symbol in symbols)
+    with run.measure("ModelStore.load_bundle", symbols=len(symbols)):
+        for symbol in symbols:
+            ModelStore.load_bundle(symbol)
+
+
+def bench_validation(run: BenchmarkRun, symbol: str, refit_every: int, jobs: int):
+    from Stock_Analysis_ML.api.ml.validation import ModelValidator
+    from api.database import DatabaseManager
+
+    df = DatabaseManager.fetch_historical_frame(symbol)
+    with run.measure("walk_forward_validation", refit_every=refit_every, jobs=jobs) as info:
+        results = ModelValidator(symbol).walk_forward_validation(df, refit_every=refit_every, n_jobs=jobs)
+        info["mae"] = round(float(results["mae"]), 6)
+
+
+def _warm_worker(modules: list) -> int:
+    # Runs in an inference worker: load what predict and chart requests need.
+    # The sleep keeps this worker busy so the other warm-up tasks spread out
+    import importlib
+    for module in modules:
+        importlib.import_module(module)
+    time.sleep(0.2)
+    return os.getpid()
+
+
+def _worker_peak_rss(_) -> tuple:
+    import resource
+    time.sleep(0.2)
+    # ru_maxrss is in KiB on Linux
+    return os.getpid(), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_api(run: BenchmarkRun, symbol: str, repeat: int):
+    """API endpoints through TestClient
+
+    Predict and chart work runs in the inference process pool. The pool is
+    started and its workers import their modules before anything is timed,
+    so "cold" means cold caches, not process start. tracemalloc only sees
+    this process, so worker memory is reported separately as peak RSS.
+    """
+    from fastapi.testclient import TestClient
+    from api.main import app
+    from api.workers import get_process_pool
+
+    endpoints = [
+        ("bars records", f"/api/py/stock/{symbol}"),
+        ("bars columnar", f"/api/py/stock/{symbol}?format=columnar"),
+        ("bars csv", f"/api/py/stock/{symbol}?format=csv"),
+        ("predict 7d", f"/api/py/stock/predict/{symbol}?days=7"),
+        ("predict 30d", f"/api/py/stock/predict/{symbol}?days=30"),
+        ("metrics", f"/api/py/metrics/{symbol}"),
+        ("metrics chart", f"/api/py/metrics/chart/{symbol}"),
+    ]
+    with TestClient(app) as client:
+        pool = get_process_pool()
+        with run.measure("inference pool start", workers=config.cpu_workers) as info:
+            modules = ["api.ml.forecasting", "api.ml.training", "api.ml.forest", "api.charts",
+                       "matplotlib.figure", "matplotlib.backends.backend_agg"]
+            pids = set(pool.map(_warm_worker, [modules] * config.cpu_workers))
+            info["started"] = len(pids)
+
+        for label, url in endpoints:
+            # The first request fills the database and response caches
+            with run.measure(f"GET {label} (cold)", url=url) as info:
+                response = client.get(url)
+                info["status"] = response.status_code
+                info["bytes"] = len(response.content)
+            with run.measure(f"GET {label} (warm x{repeat})", url=url) as info:
+                for _ in range(repeat):
+                    response = client.get(url)
+                info["status"] = response.status_code
+            etag = response.headers.get("etag")
+            if etag:
+                with run.measure(f"GET {label} (304 x{repeat})", url=url) as info:
+                    for _ in range(repeat):
+                        response = client.get(url, headers={"If-None-Match": etag})
+                    info["status"] = response.status_code
+
+        peaks = dict(pool.map(_worker_peak_rss, range(config.cpu_workers * 2)))
+        run.results.append({"name": "inference worker peak RSS",
+                            "worker_peak_rss_mb": {str(pid): round(mb, 1) for pid, mb in peaks.items()}})
+        print(f"{'inference worker peak RSS':<36} " + ", ".join(f"{mb:.1f} MB" for mb in peaks.values()))
+
+
+def compare(results: list, baseline_path: str):
+    baseline = {r["name"]: r for r in json.loads(Path(baseline_path).read_text())["results"]}
+    print(f"\nCompared with {baseline_path}:")
+    for result in results:
+        before = baseline.get(result["name"])
+        if "seconds" in result and before and before.get("seconds"):
+            print(f"{result['name']:<36} {result['seconds'] / before['seconds']:6.2f}x time"
+                  + (f" {result['peak_mb'] / before['peak_mb']:6.2f}x memory"
+                     if before.get("peak_mb") and "peak_mb" in result else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--symbols", type=int, default=3, help="Synthetic symbols to generate")
+    parser.add_argument("--years", type=float, default=5, help="Years of daily bars per symbol")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--horizon", type=int, default=30, help="Days forecast by predict_future")
+    parser.add_argument("--refit-every", type=int, default=20, help="Walk-forward refit stride")
+    parser.add_argument("--jobs", type=int, default=1, help="Walk-forward worker processes")
+    parser.add_argument("--repeat", type=int, default=20, help="Requests per warm API measurement")
+    parser.add_argument("--skip", action="append", default=[],
+                        choices=["model", "validation", "api"], help="Leave out a group")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="Skip tracemalloc, which slows allocation-heavy code")
+    parser.add_argument("--output", default=None,
+                        help="Results file (default: reports/benchmark_<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results file to compare against")
+    options = parser.parse_args()
+
+    run = BenchmarkRun(trace_memory=not options.no_memory)
+    symbols = synthetic_symbols(options.symbols)
+    frames = {symbol: synthetic_bars(i, options.years, options.seed) for i, symbol in enumerate(symbols)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.db_path = Path(tmp) / "benchmark.db"
+        config.model_store_path = Path(tmp) / "models"
+        cwd = os.getcwd()
+        os.chdir(tmp)  # validation plots are written to ./plots
+        try:
+            from initialize_db import initialize_db
+            initialize_db()
+
+            # The later groups read what the earlier ones stored
+            bench_storage(run, frames)
+            if "model" not in options.skip:
+                bench_model(run, symbols, options.horizon)
+            if "validation" not in options.skip:
+                bench_validation(run, symbols[0], options.refit_every, options.jobs)
+            if "api" not in options.skip and "model" not in options.skip:
+                bench_api(run, symbols[0], options.repeat)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "symbols": options.symbols,
+            "years": options.years,
+            "seed": options.seed,
+            "rows": sum(len(frame) for frame in frames.values()),
+            "trace_memory": run.trace_memory,
+            "notes": "peak_mb is traced in the benchmark process only; predict and chart "
+                     "work runs in inference workers, see 'inference worker peak RSS'",
+        },
+        "results": run.results,
+    }
+    output = Path(options.output or ROOT / "reports" / f"benchmark_{datetime.now().strftime('%Y%m%d%H%M%S')}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"\nResults saved to: {output}")
+
+    if options.compare:
+        compare(run.results, options.compare)
+
+
+if __name__ == "__main__":
+    main()
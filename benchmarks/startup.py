@@ -0,0 +1,149 @@
+# benchmarks/startup.py
+"""Cold start times of the CLI and the API app
+
+Every measurement is a fresh interpreter, so it includes all module imports.
+Each CLI command is measured by importing cli.py plus the modules the
+command imports when it runs, as found in its body. Exits with status 1
+when a median time is over its budget.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 10 --cli-budget 0.5 --json startup.json
+"""
+import argparse
+import ast
+import json
+import os
+from pathlib import Path
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = Path(__file__).resolve().parent.parent
+CLI_BUDGET = 0.3  # seconds
+API_BUDGET = 1.0
+# Commands that need heavy libraries; every other command gets CLI_BUDGET
+COMMAND_BUDGETS = {
+    "fetch-data": 1.0,  # pandas
+    "train-model": 3.0,  # scikit-learn
+    "train-all": 3.0,
+    "validate-model": 4.5,  # scikit-learn and matplotlib
+    "backtest": 4.5,
+    "benchmark": 4.5,
+    "feat-im": 4.5,
+}
+HEAVY_MODULES = ("pandas", "pyarrow", "sklearn", "matplotlib", "yfinance")
+
+
+# Scratch database and model paths, so no measured process touches real data
+SCRATCH_DIR = Path(tempfile.mkdtemp(prefix="startup_benchmark_"))
+
+
+def _env() -> dict:
+    # cli.py imports the api package as Stock_Analysis_ML.api, so the parent
+    # of the project directory has to be importable as well
+    env = dict(os.environ)
+    paths = [str(ROOT), str(ROOT.parent), env.get("PYTHONPATH", "")]
+    env["PYTHONPATH"] = os.pathsep.join(p for p in paths if p)
+    env["STOCK_DB_PATH"] = str(SCRATCH_DIR / "startup.db")
+    env["STOCK_MODEL_STORE_PATH"] = str(SCRATCH_DIR / "models")
+    return env
+
+
+def time_command(args, repeat: int) -> dict:
+    env = _env()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run([sys.executable, *args], cwd=ROOT, env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        seconds.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed:\n{proc.stderr}")
+    return {"median": statistics.median(seconds), "min": min(seconds), "max": max(seconds)}
+
+
+def slowest_imports(args, count: int = 10) -> list:
+    """Modules with the largest cumulative import time, from -X importtime"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", *args], cwd=ROOT, env=_env(),
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \|\s+(.*)", line)
+        if match:
+            rows.append((int(match.group(1)) / 1e6, match.group(2).strip()))
+    return sorted(rows, reverse=True)[:count]
+
+
+def heavy_modules(args) -> list:
+    """Which of HEAVY_MODULES the target has imported by the time it exits"""
+    run = f"exec({args[1]!r})" if args[0] == "-c" else f"runpy.run_path({args[0]!r}, run_name='__main__')"
+    code = "\n".join([
+        "import contextlib, io, runpy, sys",
+        f"sys.argv = {args!r}",
+        "try:",
+        "    with contextlib.redirect_stdout(io.StringIO()):",
+        f"        {run}",
+        "except SystemExit:",
+        "    pass",
+        f"print(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))",
+    ])
+    proc = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=_env(),
+                          stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    return proc.stdout.split()
+
+
+def command_imports() -> dict:
+    """Import statements inside each click command of cli.py, by command name"""
+    tree = ast.parse((ROOT / "cli.py").read_text())
+    commands = {}
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and any(
+                ast.unparse(decorator).startswith("cli.command") for decorator in node.decorator_list):
+            imports = [ast.unparse(child) for child in ast.walk(node)
+                       if isinstance(child, (ast.Import, ast.ImportFrom))]
+            commands[node.name.replace("_", "-")] = imports
+    return commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per target, the median is reported")
+    parser.add_argument("--cli-budget", type=float, default=CLI_BUDGET, help="Seconds allowed per CLI start")
+    parser.add_argument("--api-budget", type=float, default=API_BUDGET, help="Seconds allowed to import api.main:app")
+    parser.add_argument("--json", dest="json_path", default=None, help="Also write the results to this file")
+    options = parser.parse_args()
+
+    targets = [("cli.py --help", ["cli.py", "--help"], options.cli_budget)]
+    targets += [(f"cli.py {name}", ["-c", "\n".join(["import cli", *imports])],
+                 COMMAND_BUDGETS.get(name, options.cli_budget))
+                for name, imports in command_imports().items()]
+    targets.append(("api.main:app", ["-c", "from api.main import app"], options.api_budget))
+
+    results, failed = [], []
+    for label, args, budget in targets:
+        timing = time_command(args, options.repeat)
+        ok = timing["median"] <= budget
+        loaded = heavy_modules(args)
+        results.append({"target": label, "budget": budget, "ok": ok, "heavy_modules": loaded, **timing})
+        print(f"{'ok  ' if ok else 'SLOW'} {label:<40} {timing['median']:.3f}s (budget {budget:.2f}s)"
+              f"  {' '.join(loaded)}")
+        if not ok:
+            failed.append((label, args))
+
+    for label, args in failed:
+        print(f"\nSlowest imports for {label}:")
+        for seconds, module in slowest_imports(args):
+            print(f"  {seconds:.3f}s  {module}")
+
+    if options.json_path:
+        Path(options.json_path).write_text(json.dumps(results, indent=2))
+    shutil.rmtree(SCRATCH_DIR, ignore_errors=True)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
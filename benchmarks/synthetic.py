@@ -0,0 +1,47 @@
+# benchmarks/synthetic.py
+"""Deterministic synthetic OHLCV bars for benchmarks
+
+Closes follow a geometric Brownian motion; the same (symbol index, years,
+seed) always gives the same bars, so runs are comparable.
+"""
+import numpy as np
+import pandas as pd
+
+END_DATE = "2024-12-31"
+TRADING_DAYS = 252
+
+
+def synthetic_symbols(count: int) -> list:
+    return [f"SYN{i:03d}" for i in range(count)]
+
+
+def synthetic_bars(index: int, years: float, seed: int = 0, drift: float = 0.07,
+                   volatility: float = 0.2) -> pd.DataFrame:
+    """Business-day OHLCV bars ending on END_DATE for the index-th symbol"""
+    rng = np.random.default_rng([seed, index])
+    dates = pd.bdate_range(end=END_DATE, periods=int(years * TRADING_DAYS))
+    n = len(dates)
+
+    dt = 1 / TRADING_DAYS
+    shocks = rng.standard_normal(n)
+    log_returns = (drift - volatility ** 2 / 2) * dt + volatility * np.sqrt(dt) * shocks
+    start_price = rng.uniform(20, 500)
+    close = start_price * np.exp(np.cumsum(log_returns))
+
+    # Opens gap from the previous close, highs/lows bracket open and close
+    previous = np.concatenate(([start_price], close[:-1]))
+    open_ = previous * np.exp(rng.normal(0, volatility * np.sqrt(dt) / 4, n))
+    spread = np.abs(rng.normal(0, volatility * np.sqrt(dt) / 2, n))
+    high = np.maximum(open_, close) * (1 + spread)
+    low = np.minimum(open_, close) * (1 - spread)
+    volume = rng.lognormal(mean=15, sigma=0.5, size=n).astype(np.int64)
+
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume},
+                        index=dates)
+
+
+def to_records(frame: pd.DataFrame) -> dict:
+    """The {date: {column: value}} form taken by DatabaseManager.save_historical_data"""
+    frame = frame.copy()
+    frame.index = frame.index.strftime("%Y-%m-%d")
+    return frame.to_dict(orient="index")
@@ -1,36 +1,60 @@
 from config import config
+from initialize_db import initialize_db
 import click
 from datetime import datetime, timedelta
-import yfinance as yf
-from Stock_Analysis_ML.api.ml.validation import ModelValidator
 from Stock_Analysis_ML.api.database import DatabaseManager, ModelStore
-from Stock_Analysis_ML.api.ml.training import StockModelTrainer
-import pandas as pd
+import json
+import os
+
+# pandas, scikit-learn, matplotlib and yfinance are imported inside the
+# commands that use them, so short cron invocations don't pay for all of them.
+# Check cold start times with: python benchmarks/startup.py
 
 # export PYTHONPATH=$PYTHONPATH:/Users/alyssaditroia/Desktop/Stock_Analysis
+# python cli.py init-db
 # run: python cli.py fetch-data VOO 
+# python cli.py fetch-data VOO SPY QQQ --source-dir data/bars
 # python cli.py train-model VOO
+# python cli.py train-model VOO --incremental
+# python cli.py train-all --concurrency 8 --model-jobs 4
 # python cli.py validate-model VOO
+# python cli.py validate-model VOO --refit-every 20 --window sliding --jobs -1
 # python cli.py backtest VOO
 # python cli.py backtest VOO --start=2023-01-01
 # python cli.py benchmark VOO
 # python cli.py feat-im VOO
+# python cli.py predict-batch VOO SPY QQQ --horizon 7 --horizon 30
 
 @click.group()
 def cli():
     pass
 
+@cli.command()
+def init_db():
+    """Create the database or apply pending schema migrations"""
+    applied = initialize_db()
+    for version, description in applied:
+        click.echo(f"Applied migration {version}: {description}")
+    if not applied:
+        click.echo("Database schema is up to date")
+
 @cli.command()
 @click.argument('symbol')
-def validate_model(symbol: str):
+@click.option('--refit-every', default=1, show_default=True, help='Days between model refits')
+@click.option('--window', type=click.Choice(['expanding', 'sliding']), default='expanding',
+              show_default=True, help='Train on all earlier days or only the last --window-size days')
+@click.option('--window-size', default=200, show_default=True, help='Days before the first prediction')
+@click.option('--jobs', default=1, show_default=True, help='Worker processes for folds, -1 for all cores')
+def validate_model(symbol: str, refit_every: int, window: str, window_size: int, jobs: int):
     """Run walk-forward validation on the model"""
+    from Stock_Analysis_ML.api.ml.validation import ModelValidator
     db = DatabaseManager()
-    data = db.fetch_historical_data(symbol)
-    df = pd.DataFrame.from_dict(data, orient='index')
-    df.index = pd.to_datetime(df.index)
+    df = db.fetch_historical_frame(symbol)
     
     validator = ModelValidator(symbol)
-    results = validator.walk_forward_validation(df)
+    results = validator.walk_forward_validation(df, window_size=window_size,
+                                                refit_every=refit_every, window=window,
+                                                n_jobs=jobs)
     
     click.echo(f"Walk-Forward Validation Results for {symbol}:")
     click.echo(f"MAE: {results['mae']:.2f}")
@@ -42,10 +66,9 @@ def validate_model(symbol: str):
 @click.option('--start', default='2023-01-01', help='Start date for backtest\nFormat: yyyy-mm-dd')
 def backtest(symbol: str, start: str):
     """Backtest the model from specific start date"""
+    from Stock_Analysis_ML.api.ml.validation import ModelValidator
     db = DatabaseManager()
-    data = db.fetch_historical_data(symbol)
-    df = pd.DataFrame.from_dict(data, orient='index')
-    df.index = pd.to_datetime(df.index)
+    df = db.fetch_historical_frame(symbol)
     
     validator = ModelValidator(symbol)
     results = validator.backtest(df, start)
@@ -59,10 +82,9 @@ def backtest(symbol: str, start: str):
 @click.argument('symbol')
 def benchmark(symbol: str):
     """Compare model against naive baseline"""
+    from Stock_Analysis_ML.api.ml.validation import ModelValidator
     db = DatabaseManager()
-    data = db.fetch_historical_data(symbol)
-    df = pd.DataFrame.from_dict(data, orient='index')
-    df.index = pd.to_datetime(df.index)
+    df = db.fetch_historical_frame(symbol)
     
     validator = ModelValidator(symbol)
     results = validator.benchmark(df)
@@ -76,90 +98,125 @@ def benchmark(symbol: str):
 @click.argument('symbol')
 def feat_im(symbol: str):
     """Plot feature importance for trained model"""
-    db = DatabaseManager()
-    data = db.fetch_historical_data(symbol)
-    df = pd.DataFrame.from_dict(data, orient='index')
-    df.index = pd.to_datetime(df.index)
-    
-    model = ModelStore.load_model(symbol)
-    trainer = StockModelTrainer(symbol)
-    X, _ = trainer.prepare_data(df)
+    from Stock_Analysis_ML.api.ml.validation import ModelValidator
+    bundle = ModelStore.load_bundle(symbol, with_estimator=True)
+    if not bundle:
+        click.echo(f"No trained model found for {symbol}")
+        return
     
-    features = df.drop(columns=['Close']).columns.tolist()
     validator = ModelValidator(symbol)
-    plot_path = validator.plot_feature_importance(model, features)
+    plot_path = validator.plot_feature_importance(bundle["estimator"], bundle["features"])
     
     click.echo(f"Feature importance plot saved to: {plot_path}")
 
     
 @cli.command()
-@click.argument('symbol')
-def fetch_data(symbol: str):
-    """Fetch and update historical data for a stock symbol"""
+@click.argument('symbols', nargs=-1, required=True)
+@click.option('--source-dir', type=click.Path(file_okay=False), default=None,
+              help='Read <SYMBOL>.csv/.parquet files from this directory instead of Yahoo Finance')
+def fetch_data(symbols, source_dir):
+    """Fetch and update historical data for one or more stock symbols"""
+    from Stock_Analysis_ML.api.data_sources import AsyncFetcher, get_data_source
     db = DatabaseManager()
-    latest_date = db.get_latest_date(symbol)
-    
-    if latest_date:
-        start_date = latest_date + timedelta(days=1)
-        if start_date > datetime.now():
-            click.echo(f"Data for {symbol} is already up-to-date.")
-            return
-    else:
-        start_date = datetime.now() - timedelta(days=config.training_period_days)
-    
     end_date = datetime.now()
-    
-    click.echo(f"Fetching data for {symbol} from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
-    
-    stock = yf.Ticker(symbol)
-    data = stock.history(
-        start=start_date.strftime("%Y-%m-%d"),
-        end=end_date.strftime("%Y-%m-%d"),
-        interval="1d"
-    ).dropna()
-    
-    if data.empty:
-        click.echo(f"No data found for {symbol}")
-        return
-    
-    formatted_data = {
-        row.name.strftime("%Y-%m-%d"): {
-            "Open": row["Open"],
-            "High": row["High"],
-            "Low": row["Low"],
-            "Close": row["Close"],
-            "Volume": row["Volume"],
-        }
-        for _, row in data.iterrows()
-    }
-    
-    DatabaseManager.save_historical_data(symbol, formatted_data)
-    click.echo(f"Successfully updated {len(formatted_data)} days of data for {symbol}")
+    requests = []
+    
+    for symbol in dict.fromkeys(symbols):
+        latest_date = db.get_latest_date(symbol)
+        if latest_date:
+            start_date = latest_date + timedelta(days=1)
+            if start_date > end_date:
+                click.echo(f"Data for {symbol} is already up-to-date.")
+                continue
+        else:
+            start_date = end_date - timedelta(days=config.training_period_days)
+        
+        click.echo(f"Fetching data for {symbol} from {start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}")
+        requests.append((symbol, start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")))
+    
+    fetcher = AsyncFetcher(get_data_source(source_dir))
+    for (symbol, _, _), data, error in fetcher.fetch_all(requests):
+        if error is not None:
+            click.echo(f"Failed to fetch {symbol}: {error}")
+            continue
+        if data.empty:
+            click.echo(f"No data found for {symbol}")
+            continue
+        
+        result = DatabaseManager.save_historical_frame(symbol, data)
+        click.echo(f"Successfully updated {result['inserted']} days of data for {symbol} "
+                   f"({result['skipped']} already stored)")
 
 @cli.command()
 @click.argument('symbol')
-def train_model(symbol: str):
+@click.option('--force', is_flag=True, help='Retrain even if the training input has not changed')
+@click.option('--incremental', is_flag=True, help='Add trees for new bars instead of a full refit when safe')
+def train_model(symbol: str, force: bool, incremental: bool):
     """Train and save a new model for the given symbol"""
-    db = DatabaseManager()
-    data = db.fetch_historical_data(symbol)
+    from Stock_Analysis_ML.api.ml.scheduler import train_symbol
+    result = train_symbol(symbol, force=force, incremental=incremental)
     
-    if not data or len(data) < 100:
+    if result["status"] == "insufficient_data":
         click.echo(f"Insufficient data for {symbol}")
         return
+    if result["status"] == "unchanged":
+        click.echo(f"Model for {symbol} is up to date (fingerprint {result['fingerprint'][:12]})")
+        return
     
-    df = pd.DataFrame.from_dict(data, orient='index')
-    df.index = pd.to_datetime(df.index)
+    if "full_retrain_reason" in result:
+        click.echo(f"Full retrain needed: {result['full_retrain_reason']}")
+    test_metrics = result["metrics"]
+    action = "updated" if result["status"] == "updated" else "trained"
+    click.echo(f"Model {action} for {symbol} with test metrics:")
+    click.echo(f"MSE: {test_metrics['mse']:.2f}")
+    click.echo(f"RMSE: {test_metrics['rmse']:.2f}")
+    click.echo(f"MAE: {test_metrics['mae']:.2f}")
+
+@cli.command()
+@click.argument('symbols', nargs=-1)
+@click.option('--concurrency', default=os.cpu_count() or 1, show_default=True,
+              help='Symbols trained at the same time, each in its own process')
+@click.option('--model-jobs', default=1, show_default=True, help='Cores used by each model fit')
+@click.option('--force', is_flag=True, help='Retrain even if the training input has not changed')
+@click.option('--incremental', is_flag=True, help='Add trees for new bars instead of a full refit when safe')
+@click.option('--report', type=click.Path(dir_okay=False), default=None,
+              help='Where to write the JSON summary (default: reports/train_all_<time>.json)')
+def train_all(symbols, concurrency: int, model_jobs: int, force: bool, incremental: bool, report):
+    """Train models for many symbols, all stored symbols by default"""
+    from Stock_Analysis_ML.api.ml.scheduler import TrainingScheduler
+    symbols = symbols or DatabaseManager.list_symbols()
+    if not symbols:
+        click.echo("No symbols to train")
+        return
     
-    trainer = StockModelTrainer(symbol)
-    model, metrics = trainer.train_model(df)
+    def show(result):
+        click.echo(f"{result['symbol']}: {result['status']} ({result.get('seconds', 0):.1f}s)")
     
-    DatabaseManager.save_model_metrics(symbol, metrics)
-    ModelStore.save_model(symbol, model)
+    scheduler = TrainingScheduler(symbols, concurrency=concurrency, model_jobs=model_jobs,
+                                  force=force, incremental=incremental)
+    summary = scheduler.run(on_result=show)
+    report_path = scheduler.write_report(summary, report)
     
-    click.echo(f"Model trained for {symbol} with metrics:")
-    click.echo(f"MSE: {metrics['mse']:.2f}")
-    click.echo(f"RMSE: {metrics['rmse']:.2f}")
-    click.echo(f"MAE: {metrics['mae']:.2f}")
+    counts = ", ".join(f"{count} {status}" for status, count in sorted(summary["counts"].items()))
+    click.echo(f"Finished {len(symbols)} symbols in {summary['seconds']:.1f}s: {counts}")
+    click.echo(f"Report saved to: {report_path}")
+
+@cli.command()
+@click.argument('symbols', nargs=-1, required=True)
+@click.option('--horizon', 'horizons', type=int, multiple=True, default=[7], show_default=True,
+              help='Days to forecast, repeat for several horizons')
+@click.option('--workers', type=int, default=None, help='Number of symbols forecast in parallel')
+@click.option('--output', type=click.File('w'), default='-', help='JSON lines output file')
+def predict_batch(symbols, horizons, workers, output):
+    """Forecast several symbols and horizons in one run"""
+    from Stock_Analysis_ML.api.ml.forecasting import forecast_symbols
+    failed = 0
+    for result in forecast_symbols(symbols, list(horizons), max_workers=workers):
+        failed += "error" in result
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+    
+    click.echo(f"Forecast {len(set(symbols)) - failed} symbols, {failed} failed", err=True)
 
 if __name__ == "__main__":
     cli()
\ No newline at end of file
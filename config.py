@@ -1,10 +1,25 @@
+import os
 import pathlib
 
 BASE_DIR = pathlib.Path(__file__).resolve().parent.parent
-DB_PATH = BASE_DIR / "db/ml_dashboard.db"
-MODEL_STORE_PATH = BASE_DIR / "models"
+# Both can be overridden from the environment, e.g. to point tools at a scratch copy
+DB_PATH = pathlib.Path(os.environ.get("STOCK_DB_PATH", BASE_DIR / "db/ml_dashboard.db"))
+MODEL_STORE_PATH = pathlib.Path(os.environ.get("STOCK_MODEL_STORE_PATH", BASE_DIR / "models"))
 TRAINING_PERIOD_DAYS = 3 * 365
 DATA_CACHE_DAYS = 1
+SQLITE_CACHE_SIZE_KB = 8 * 1024  # Per connection
+DB_POOL_SIZE = 8  # Open connections per mode (read-only, read-write) and process
+MODEL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+MODEL_MMAP_MODE = "r"  # Share forest node arrays via the page cache; None loads private copies
+FORECAST_WORKERS = 4
+DATA_SOURCE_DIR = None  # Directory of <SYMBOL>.csv/.parquet files instead of Yahoo Finance
+FETCH_CONCURRENCY = 8
+FETCH_REQUESTS_PER_SECOND = 4.0
+FETCH_RETRIES = 3
+STREAM_CHUNK_ROWS = 10_000
+RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CPU_WORKERS = 2  # Processes for inference and chart rendering in the API
+REQUEST_LOG_LEVEL = "INFO"  # Per-request stage breakdowns are logged at INFO
 
 class Config:
     def __init__(self):
@@ -12,5 +27,18 @@ class Config:
         self.model_store_path = MODEL_STORE_PATH
         self.training_period_days = TRAINING_PERIOD_DAYS
         self.data_cache_days = DATA_CACHE_DAYS
+        self.sqlite_cache_size_kb = SQLITE_CACHE_SIZE_KB
+        self.db_pool_size = DB_POOL_SIZE
+        self.model_cache_max_bytes = MODEL_CACHE_MAX_BYTES
+        self.model_mmap_mode = MODEL_MMAP_MODE
+        self.forecast_workers = FORECAST_WORKERS
+        self.data_source_dir = DATA_SOURCE_DIR
+        self.fetch_concurrency = FETCH_CONCURRENCY
+        self.fetch_requests_per_second = FETCH_REQUESTS_PER_SECOND
+        self.fetch_retries = FETCH_RETRIES
+        self.stream_chunk_rows = STREAM_CHUNK_ROWS
+        self.response_cache_max_bytes = RESPONSE_CACHE_MAX_BYTES
+        self.cpu_workers = CPU_WORKERS
+        self.request_log_level = REQUEST_LOG_LEVEL
 
 config = Config()
\ No newline at end of file
@@ -0,0 +1,160 @@
+import sqlite3
+from typing import Callable, List, Tuple
+
+# Versioned schema migrations for the SQLite store.
+# The schema version lives in PRAGMA user_version. Each migration runs in its
+# own transaction together with the version bump, so a failed migration
+# leaves the database at the previous version.
+# To add one: append (next version, description, function) to MIGRATIONS.
+
+
+def _add_missing_columns(cursor, table: str, columns: dict):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns.items():
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+def _rename_legacy_table(cursor, table: str, required_column: str):
+    """Keep rows of an older, incompatible table layout out of the way"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    columns = {row[1] for row in cursor.fetchall()}
+    if columns and required_column not in columns:
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+
+
+def _initial_schema(cursor):
+    # Also brings databases created before versioning up to the same layout
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS historical_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            date TEXT NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume INTEGER NOT NULL,
+            UNIQUE(symbol, date)
+        )
+    """)
+
+    _rename_legacy_table(cursor, "metrics", "symbol")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            model_type TEXT NOT NULL,
+            mse REAL NOT NULL,
+            rmse REAL NOT NULL,
+            mae REAL NOT NULL,
+            fingerprint TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    _add_missing_columns(cursor, "metrics", {"fingerprint": "TEXT"})
+
+    # Forecasts are only valid for the model and data they were made from
+    _rename_legacy_table(cursor, "predictions", "model_version")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS predictions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT NOT NULL,
+            model_version TEXT NOT NULL,
+            last_data_date TEXT NOT NULL,
+            horizon INTEGER NOT NULL,
+            predictions TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(symbol, model_version, last_data_date, horizon)
+        )
+    """)
+
+    # Refresh watermarks: gaps holds [start, end] date ranges after
+    # last_date that are known to have no bars (e.g. holidays)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS symbol_watermarks (
+            symbol TEXT PRIMARY KEY,
+            last_date TEXT,
+            last_fetch_at TIMESTAMP,
+            gaps TEXT NOT NULL DEFAULT '[]'
+        )
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO symbol_watermarks (symbol, last_date)
+        SELECT symbol, MAX(date) FROM historical_data GROUP BY symbol
+    """)
+
+
+def _metrics_covering_index(cursor):
+    # Serves "WHERE symbol = ? ORDER BY created_at DESC" from the index alone
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_metrics_symbol_created
+        ON metrics (symbol, created_at DESC, model_type, mse, rmse, mae)
+    """)
+
+
+def _clustered_historical_data(cursor):
+    # Store bars in (symbol, date) order in the primary key b-tree itself, so
+    # range scans for a symbol read the rows directly without a rowid lookup
+    cursor.execute("""
+        CREATE TABLE historical_data_clustered (
+            symbol TEXT NOT NULL,
+            date TEXT NOT NULL,
+            open REAL NOT NULL,
+            high REAL NOT NULL,
+            low REAL NOT NULL,
+            close REAL NOT NULL,
+            volume INTEGER NOT NULL,
+            PRIMARY KEY (symbol, date)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("""
+        INSERT OR IGNORE INTO historical_data_clustered
+        SELECT symbol, date, open, high, low, close, volume
+        FROM historical_data
+        WHERE symbol IS NOT NULL AND date IS NOT NULL
+          AND open IS NOT NULL AND high IS NOT NULL AND low IS NOT NULL
+          AND close IS NOT NULL AND volume IS NOT NULL
+    """)
+    cursor.execute("DROP TABLE historical_data")
+    cursor.execute("ALTER TABLE historical_data_clustered RENAME TO historical_data")
+
+
+MIGRATIONS: List[Tuple[int, str, Callable]] = [
+    (1, "initial schema", _initial_schema),
+    (2, "covering index for metrics lookups", _metrics_covering_index),
+    (3, "cluster historical_data by (symbol, date) without rowid", _clustered_historical_data),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+    """Apply pending migrations in order and return the ones applied"""
+    applied = []
+    if schema_version(conn) >= LATEST_VERSION:
+        return applied
+
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None  # Manage transactions explicitly
+    try:
+        for version, description, apply in MIGRATIONS:
+            # Take the write lock first so concurrent processes migrate once
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if schema_version(conn) >= version:
+                    conn.execute("ROLLBACK")
+                    continue
+                apply(conn.cursor())
+                conn.execute(f"PRAGMA user_version = {version}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            applied.append((version, description))
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The app imports config and the api package from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,25 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+
+
+def test_startup_migrates_the_database(tmp_path, monkeypatch):
+    from fastapi.testclient import TestClient
+    from config import config
+    from migrations import LATEST_VERSION
+    from api import workers
+    from api.main import app
+
+    monkeypatch.setattr(config, "db_path", tmp_path / "api.db")
+    monkeypatch.setattr(config, "model_store_path", tmp_path / "models")
+    with TestClient(app) as client:
+        assert client.get("/api/py/system/stats").status_code == 200
+        assert config.model_store_path.is_dir()
+        workers.get_process_pool()
+
+    with sqlite3.connect(config.db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == LATEST_VERSION
+    assert workers._pool is None
@@ -0,0 +1,27 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    from config import config
+    from initialize_db import initialize_db
+
+    monkeypatch.setattr(config, "db_path", tmp_path / "database.db")
+    initialize_db()
+
+
+def test_save_historical_data_counts_new_and_existing_bars(db):
+    from api.database import DatabaseManager
+
+    bars = {"2024-01-02": {"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 100}}
+    assert DatabaseManager.save_historical_data("TEST", bars) == {"inserted": 1, "skipped": 0}
+    assert DatabaseManager.save_historical_data("TEST", bars) == {"inserted": 0, "skipped": 1}
+
+
+def test_save_historical_data_ignores_empty_input(db):
+    from api.database import DatabaseManager
+
+    assert DatabaseManager.save_historical_data("TEST", {}) == {"inserted": 0, "skipped": 0}
+    assert DatabaseManager.fetch_historical_data("TEST") == {}
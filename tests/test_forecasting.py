@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from api.ml.forest import ForestPredictor, flatten_forest
+from api.ml.training import StockModelTrainer
+
+
+def reference_predict_future(trainer, model, data, days):
+    """The original recursive forecast: rebuild all features after every step"""
+    predictions = {}
+    current_data = data.copy()
+    for _ in range(days):
+        features = trainer._create_features(current_data).iloc[-1:][trainer.features]
+        pred = model.predict(trainer.scaler.transform(features))[0]
+        new_date = current_data.index[-1] + timedelta(days=1)
+        new_row = {
+            'Open': pred * 0.995,
+            'High': pred * 1.01,
+            'Low': pred * 0.99,
+            'Close': pred,
+            'Volume': current_data['Volume'].iloc[-7:].mean(),
+        }
+        current_data = pd.concat([current_data, pd.DataFrame([new_row], index=[new_date])])
+        predictions[new_date.strftime("%Y-%m-%d")] = round(pred, 2)
+    return predictions
+
+
+def synthetic_bars(days=400, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2024-12-31", periods=days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.002, days)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 5_000_000, days),
+    }, index=index)
+
+
+@pytest.fixture(scope="module")
+def trained():
+    data = synthetic_bars()
+    trainer = StockModelTrainer("TEST", n_jobs=1)
+    model, _ = trainer.train_model(data)
+    return trainer, model, data
+
+
+@pytest.mark.parametrize("days", [1, 7, 30])
+def test_predict_future_matches_reference(trained, days):
+    trainer, model, data = trained
+    assert trainer.predict_future(model, data, days) == reference_predict_future(trainer, model, data, days)
+
+
+def test_predict_future_with_flat_forest(trained):
+    trainer, model, data = trained
+    predictor = ForestPredictor(flatten_forest(model))
+    assert trainer.predict_future(predictor, data, 30) == reference_predict_future(trainer, model, data, 30)
+
+
+def test_restored_trainer_predicts_the_same(trained):
+    trainer, model, data = trained
+    bundle = trainer.to_bundle(model, {})
+    restored = StockModelTrainer.from_bundle(bundle, n_jobs=1)
+    assert restored.predict_future(model, data.iloc[-8:], 14) == trainer.predict_future(model, data, 14)
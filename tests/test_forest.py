@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+ensemble = pytest.importorskip("sklearn.ensemble")
+joblib = pytest.importorskip("joblib")
+
+from api.ml.forest import ForestPredictor, flatten_forest
+
+
+def fitted_forest(n_estimators=20, max_depth=8):
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(400, 6))
+    y = X[:, 0] * 3 + np.sin(X[:, 1]) + rng.normal(scale=0.1, size=400)
+    model = ensemble.RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=0)
+    return model.fit(X, y), rng.normal(size=(50, 6))
+
+
+def test_flat_forest_matches_sklearn():
+    model, X = fitted_forest()
+    np.testing.assert_allclose(ForestPredictor(flatten_forest(model)).predict(X), model.predict(X),
+                               rtol=0, atol=1e-9)
+
+
+def test_flat_forest_handles_unlimited_depth():
+    model, X = fitted_forest(max_depth=None)
+    np.testing.assert_allclose(ForestPredictor(flatten_forest(model)).predict(X), model.predict(X),
+                               rtol=0, atol=1e-9)
+
+
+def test_memory_mapped_forest_is_read_in_place(tmp_path):
+    model, X = fitted_forest()
+    joblib.dump({"forest": flatten_forest(model)}, tmp_path / "m.joblib", compress=0)
+    forest = joblib.load(tmp_path / "m.joblib", mmap_mode="r")["forest"]
+
+    assert isinstance(forest["left"], np.memmap)
+    np.testing.assert_allclose(ForestPredictor(forest).predict(X), model.predict(X), rtol=0, atol=1e-9)
@@ -0,0 +1,76 @@
+from datetime import date, datetime
+
+import pytest
+
+from api.helper import missing_ranges
+
+
+def test_missing_period_is_one_range_across_weekends():
+    # Last bar on a Wednesday, four weeks of missing bars
+    assert missing_ranges(date(2026, 7, 1), date(2026, 7, 29), []) == [(date(2026, 7, 2), date(2026, 7, 29))]
+
+
+def test_today_is_left_out():
+    assert missing_ranges(date(2026, 7, 1), date(2026, 7, 2), []) == []
+    assert missing_ranges(date(2026, 7, 1), date(2026, 7, 3), []) == [(date(2026, 7, 2), date(2026, 7, 3))]
+
+
+def test_ranges_split_around_recorded_gaps():
+    gaps = [(date(2026, 7, 3), date(2026, 7, 6))]
+    assert missing_ranges(date(2026, 7, 1), date(2026, 7, 10), gaps) == [
+        (date(2026, 7, 2), date(2026, 7, 3)),
+        (date(2026, 7, 7), date(2026, 7, 10)),
+    ]
+
+
+def test_gap_at_the_end_leaves_nothing_after_it():
+    gaps = [(date(2026, 7, 2), date(2026, 7, 9))]
+    assert missing_ranges(date(2026, 7, 1), date(2026, 7, 10), gaps) == []
+
+
+def test_up_to_date_symbol_needs_nothing():
+    assert missing_ranges(date(2026, 7, 9), date(2026, 7, 10), []) == []
+
+
+class FlakySource:
+    """Serves synthetic weekday bars, except for ranges starting on failing_start"""
+
+    def __init__(self, failing_start):
+        self.failing_start = failing_start
+
+    def fetch_history(self, symbol, start, end):
+        import pandas as pd
+        if start == self.failing_start:
+            raise ConnectionError("source unavailable")
+        index = pd.bdate_range(start, end, inclusive="left")
+        return pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 100}, index=index)
+
+
+def test_failed_range_stops_the_refresh(tmp_path, monkeypatch):
+    pd = pytest.importorskip("pandas")
+    from config import config
+    from initialize_db import initialize_db
+    import api.helper as helper
+    from api.data_sources import AsyncFetcher, DataSource
+    from api.database import DatabaseManager
+
+    monkeypatch.setattr(config, "db_path", tmp_path / "refresh.db")
+    monkeypatch.setattr(helper, "AsyncFetcher",
+                        lambda source: AsyncFetcher(source, retries=0, requests_per_second=1000))
+    initialize_db()
+
+    bars = pd.DataFrame({"Open": 1.0, "High": 2.0, "Low": 0.5, "Close": 1.5, "Volume": 100},
+                        index=pd.bdate_range("2026-06-01", "2026-07-01"))
+    DatabaseManager.save_historical_frame("TEST", bars)
+    # A known holiday gap splits the refresh into two ranges
+    DatabaseManager.update_watermark("TEST", datetime(2026, 7, 1), [(date(2026, 7, 3), date(2026, 7, 3))])
+
+    source = type("Source", (FlakySource, DataSource), {})("2026-07-02")
+    helper.update_existing_data(source)
+
+    # The later range succeeded but must not be saved past the failed one
+    assert DatabaseManager.get_latest_date("TEST") == datetime(2026, 7, 1)
+    assert DatabaseManager.fetch_watermarks()["TEST"]["last_date"] == date(2026, 7, 1)
+
+    helper.update_existing_data(type("Source", (FlakySource, DataSource), {})(None))
+    assert DatabaseManager.get_latest_date("TEST").date() > date(2026, 7, 2)
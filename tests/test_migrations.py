@@ -0,0 +1,71 @@
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from migrations import LATEST_VERSION, migrate, schema_version
+
+BASELINE_DB = Path(__file__).resolve().parent.parent / "db" / "ml_dashboard.db"
+
+
+@pytest.fixture
+def baseline(tmp_path):
+    """A copy of the shipped database, which predates schema versioning"""
+    path = tmp_path / "baseline.db"
+    shutil.copy(BASELINE_DB, path)
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+
+
+def table_sql(conn, name):
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+
+def columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def test_baseline_is_migrated_to_latest(baseline):
+    bars = baseline.execute("SELECT symbol, date, open, high, low, close, volume "
+                            "FROM historical_data ORDER BY symbol, date").fetchall()
+    old_metrics = baseline.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
+    assert schema_version(baseline) == 0
+
+    applied = migrate(baseline)
+
+    assert [version for version, _ in applied] == list(range(1, LATEST_VERSION + 1))
+    assert schema_version(baseline) == LATEST_VERSION
+    # Bars survive the rebuild into the clustered table
+    assert baseline.execute("SELECT symbol, date, open, high, low, close, volume "
+                            "FROM historical_data ORDER BY symbol, date").fetchall() == bars
+    assert "WITHOUT ROWID" in table_sql(baseline, "historical_data")
+    # Incompatible tables are kept aside, not dropped
+    assert baseline.execute("SELECT COUNT(*) FROM metrics_legacy").fetchone()[0] == old_metrics
+    assert {"symbol", "fingerprint"} <= columns(baseline, "metrics")
+    assert "model_version" in columns(baseline, "predictions")
+    assert table_sql(baseline, "idx_metrics_symbol_created") is not None
+    # Watermarks are seeded from the stored bars
+    assert dict(baseline.execute("SELECT symbol, last_date FROM symbol_watermarks").fetchall()) == \
+        dict(baseline.execute("SELECT symbol, MAX(date) FROM historical_data GROUP BY symbol").fetchall())
+
+
+def test_migrate_is_idempotent(baseline):
+    migrate(baseline)
+    schema = baseline.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall()
+    assert migrate(baseline) == []
+    assert baseline.execute("SELECT name, sql FROM sqlite_master ORDER BY name").fetchall() == schema
+
+
+def test_new_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "new.db")
+    migrate(conn)
+    assert schema_version(conn) == LATEST_VERSION
+    conn.execute("INSERT INTO historical_data (symbol, date, open, high, low, close, volume) "
+                 "VALUES ('VOO', '2024-01-02', 1, 2, 0.5, 1.5, 100)")
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO historical_data (symbol, date, open, high, low, close, volume) "
+                     "VALUES ('VOO', '2024-01-02', 1, 2, 0.5, 1.5, 100)")
+    conn.close()
@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+
+from api.ml.training import StockModelTrainer
+
+
+def synthetic_bars(days=400, seed=0):
+    rng = np.random.default_rng(seed)
+    index = pd.bdate_range(end="2024-12-31", periods=days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, days)))
+    return pd.DataFrame({
+        "Open": close * (1 + rng.normal(0, 0.002, days)),
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": rng.integers(1_000_000, 5_000_000, days),
+    }, index=index)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    """Point the database and model store at a fresh temporary directory"""
+    from config import config
+    from initialize_db import initialize_db
+
+    monkeypatch.setattr(config, "db_path", tmp_path / "training.db")
+    monkeypatch.setattr(config, "model_store_path", tmp_path / "models")
+    initialize_db()
+
+
+def test_daily_update_is_incremental(store):
+    from api.database import DatabaseManager
+    from api.ml.scheduler import train_symbol
+
+    data = synthetic_bars()
+    DatabaseManager.save_historical_frame("TEST", data.iloc[:-5])
+    assert train_symbol("TEST", n_jobs=1)["status"] == "trained"
+
+    DatabaseManager.save_historical_frame("TEST", data.iloc[-5:])
+    result = train_symbol("TEST", n_jobs=1, incremental=True)
+    assert result["status"] == "updated", result.get("full_retrain_reason")
+
+
+def test_out_of_range_bars_need_a_full_retrain():
+    data = synthetic_bars()
+    trainer = StockModelTrainer("TEST", n_jobs=1)
+    model, metrics = trainer.train_model(data.iloc[:-5])
+    bundle = trainer.to_bundle(model, metrics)
+    restored = StockModelTrainer.from_bundle(bundle, n_jobs=1)
+    assert restored.full_retrain_reason(bundle, data) is None
+
+    jumped = data.copy()
+    jumped.iloc[-5:, :4] *= 3
+    assert restored.full_retrain_reason(bundle, jumped) == "new bars fall outside the trained feature range"
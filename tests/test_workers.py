@@ -0,0 +1,40 @@
+import asyncio
+import os
+import signal
+
+import pytest
+
+from api import workers
+
+
+@pytest.fixture
+def pool():
+    yield
+    workers.shutdown_process_pool()
+
+
+def test_killed_worker_gets_a_new_pool(pool):
+    async def scenario():
+        first = await workers.single_flight.run(("pid", 1), os.getpid)
+        os.kill(first, signal.SIGKILL)
+        await asyncio.sleep(0.5)
+        return first, await workers.single_flight.run(("pid", 2), os.getpid)
+
+    first, second = asyncio.run(scenario())
+    assert second != first
+
+
+def test_task_that_kills_its_worker_raises(pool):
+    from concurrent.futures.process import BrokenProcessPool
+
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(workers.run_in_pool(os._exit, 1))
+    # The pool is usable again afterwards
+    assert asyncio.run(workers.run_in_pool(os.getpid)) != os.getpid()
+
+
+def test_workers_report_their_cache_stats(pool):
+    pid = asyncio.run(workers.single_flight.run(("pid", 3), os.getpid))
+    stats = workers.worker_stats()[str(pid)]
+    assert set(stats) == {"db_pool", "model_cache"}
+    assert stats["model_cache"]["entries"] == 0